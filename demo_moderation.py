@@ -6,16 +6,33 @@ This script demonstrates the AI-powered toxicity detection capabilities
 of the moderation service with a user-friendly interface.
 
 Usage:
-    python demo_moderation.py [--url URL] [--interactive] [--no-tests]
+    python demo_moderation.py [--url URL] [--interactive] [--no-tests] [--async]
 """
 
 import argparse
+import asyncio
 import json
+import numpy as np
 import requests
 import sys
 import time
-from datetime import datetime
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain, islice
+from typing import Dict, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # ANSI color codes for terminal output
 class Colors:
@@ -29,9 +46,39 @@ class Colors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
+def _dumps(payload) -> bytes:
+    """Serialize a request payload, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode('utf-8')
+
+def _loads(body: bytes):
+    """Parse a JSON response body, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(body)
+    return json.loads(body)
+
+def _make_session() -> requests.Session:
+    """Create a pooled HTTP session shared by all demo requests."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+# Only emit ANSI color codes when writing to a terminal
+USE_COLOR = sys.stdout.isatty()
+
+def colorize(text: str, color: str = Colors.ENDC) -> str:
+    """Wrap text in a color code (plain text when output is not a terminal)."""
+    if not USE_COLOR:
+        return text
+    return f"{color}{text}{Colors.ENDC}"
+
 def print_colored(text: str, color: str = Colors.ENDC) -> None:
     """Print text with color."""
-    print(f"{color}{text}{Colors.ENDC}")
+    print(colorize(text, color))
 
 def print_header(title: str) -> None:
     """Print a formatted header."""
@@ -50,27 +97,117 @@ def format_toxicity_result(result: Dict) -> None:
         status_color = Colors.OKGREEN
         status = "✅ CLEAN"
     
-    print_colored(f"Status: {status}", status_color)
-    print_colored(f"Toxicity Score: {result.get('toxicity_score', 'N/A')} / 1.0", Colors.OKBLUE)
-    print_colored(f"Confidence: {result.get('confidence', 'N/A')}", Colors.OKBLUE)
-    print_colored(f"Model Used: {result.get('model_used', 'N/A')}", Colors.OKBLUE)
-    
     categories = result.get('categories', [])
     if categories:
-        print_colored(f"Categories: {', '.join(categories)}", Colors.WARNING)
+        categories_line = colorize(f"Categories: {', '.join(categories)}", Colors.WARNING)
     else:
-        print_colored("Categories: None detected", Colors.OKBLUE)
+        categories_line = colorize("Categories: None detected", Colors.OKBLUE)
     
-    print_colored(f"Content Length: {result.get('content_length', 'N/A')} characters", Colors.OKBLUE)
-    print_colored(f"Timestamp: {result.get('timestamp', 'N/A')}", Colors.OKBLUE)
-    print()
+    # Build the whole block and write it in one call
+    lines = [
+        colorize(f"Status: {status}", status_color),
+        colorize(f"Toxicity Score: {result.get('toxicity_score', 'N/A')} / 1.0", Colors.OKBLUE),
+        colorize(f"Confidence: {result.get('confidence', 'N/A')}", Colors.OKBLUE),
+        colorize(f"Model Used: {result.get('model_used', 'N/A')}", Colors.OKBLUE),
+        categories_line,
+        colorize(f"Content Length: {result.get('content_length', 'N/A')} characters", Colors.OKBLUE),
+        colorize(f"Timestamp: {result.get('timestamp', 'N/A')}", Colors.OKBLUE),
+        "",
+    ]
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+def _build_yeets(test_cases: List[Dict], prefix: str) -> List[Dict]:
+    """Build a batch endpoint payload from demo test cases."""
+    # Read the clock once for the whole batch rather than once per yeet
+    timestamp = int(time.time())
+    return [
+        {
+            "content": test["content"],
+            "yeet_id": f"{prefix}-{i}-{timestamp}",
+            "user_id": "demo-user"
+        }
+        for i, test in enumerate(test_cases)
+    ]
+
+def _chunks(items: List, size: int):
+    """Yield successive lists of at most size items."""
+    it = iter(items)
+    return iter(lambda: list(islice(it, size)), [])
+
+def _chunked_batch(session: requests.Session, service_url: str, yeets: List[Dict],
+                   chunk_size: int = 32, max_workers: int = 8) -> List[Dict]:
+    """Send yeets to the batch endpoint in chunks, posting the chunks concurrently.
+    
+    Keeps each request under the service's batch size limit. Results are
+    returned in the original order; a failed chunk raises RequestException
+    (or ValueError when its response body is not JSON).
+    """
+    url = f"{service_url}/api/moderation/batch"
+    
+    def post_chunk(chunk: List[Dict]) -> List[Dict]:
+        response = session.post(url, data=_dumps({"yeets": chunk}), timeout=60)
+        response.raise_for_status()
+        return _loads(response.content).get('results', [])
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        parts = list(executor.map(post_chunk, _chunks(yeets, chunk_size)))
+    
+    return list(chain.from_iterable(parts))
+
+def _parallel_check(session: requests.Session, service_url: str, contents: List[str],
+                    max_workers: int = 8) -> List[Dict]:
+    """Check several contents concurrently through the single-content endpoint.
+    
+    Results are returned in the same order as contents; failed requests are
+    reported as {'error': ...} entries, matching the batch endpoint's format.
+    """
+    url = f"{service_url}/api/moderation/check"
+    results: List[Dict] = [{} for _ in contents]
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(session.post, url, data=_dumps({"content": content, "user_id": "demo-user"}), timeout=30): i
+            for i, content in enumerate(contents)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                response = future.result()
+                response.raise_for_status()
+                results[i] = _loads(response.content)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                results[i] = {'error': str(e)}
+    
+    return results
 
-def test_service_health(service_url: str) -> bool:
+async def _async_post(client: "aiohttp.ClientSession", url: str, payload: Dict) -> Dict:
+    """POST a single payload and decode the JSON response."""
+    try:
+        async with client.post(url, json=payload) as response:
+            response.raise_for_status()
+            return await response.json()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        return {'error': str(e)}
+
+async def _async_check(service_url: str, contents: List[str]) -> List[Dict]:
+    """Check several contents concurrently on a single event loop."""
+    url = f"{service_url}/api/moderation/check"
+    connector = aiohttp.TCPConnector(limit=100, limit_per_host=10, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=30)
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as client:
+        return await asyncio.gather(*[
+            _async_post(client, url, {"content": content, "user_id": "demo-user"})
+            for content in contents
+        ])
+
+def test_service_health(session: requests.Session, service_url: str) -> bool:
     """Test if the service is healthy and accessible."""
     print_header("🏥 HEALTH CHECK")
     
     try:
-        response = requests.get(f"{service_url}/health", timeout=10)
+        response = session.get(f"{service_url}/health", timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -88,38 +225,67 @@ def test_service_health(service_url: str) -> bool:
         print_colored(f"❌ Service health check failed: {str(e)}", Colors.FAIL)
         return False
 
-def test_single_content(service_url: str, content: str, description: str = "") -> Optional[Dict]:
-    """Test a single piece of content for toxicity."""
-    if description:
-        print_colored(f"🧪 Testing: {description}", Colors.HEADER)
-    print_colored(f'Content: "{content}"', Colors.OKBLUE)
-    print()
+# Recent single-check responses per (service URL, content), least recently used first
+CHECK_CACHE_SIZE = 1024
+_check_cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+def _check_cached(session: requests.Session, service_url: str, content: str) -> Dict:
+    """POST a single content check and return the decoded result.
     
-    try:
+    Results are cached per (service, content), so repeated content skips the
+    request entirely; the per-call yeet_id and user_id are filled in fresh each
+    time, while timestamp stays the server's time for the original check.
+    Failed requests raise and are therefore never cached.
+    """
+    key = (service_url, content)
+    body = _check_cache.get(key)
+    if body is None:
         payload = {
             "content": content,
             "yeet_id": f"demo-{int(time.time())}",
             "user_id": "demo-user"
         }
         
-        response = requests.post(
+        response = session.post(
             f"{service_url}/api/moderation/check",
-            json=payload,
-            headers={"Content-Type": "application/json"},
+            data=_dumps(payload),
             timeout=30
         )
         response.raise_for_status()
-        
-        result = response.json()
+        # Decode before caching so a non-JSON body is never stored
+        result = _loads(response.content)
+        _check_cache[key] = response.content
+        if len(_check_cache) > CHECK_CACHE_SIZE:
+            _check_cache.popitem(last=False)
+        return result
+    
+    _check_cache.move_to_end(key)
+    # Decode per call so callers never share a cached dict
+    result = _loads(body)
+    result.update({
+        "yeet_id": f"demo-{int(time.time())}",
+        "user_id": "demo-user"
+    })
+    return result
+
+def test_single_content(session: requests.Session, service_url: str, content: str, description: str = "") -> Optional[Dict]:
+    """Test a single piece of content for toxicity."""
+    if description:
+        print_colored(f"🧪 Testing: {description}", Colors.HEADER)
+    print_colored(f'Content: "{content}"', Colors.OKBLUE)
+    print()
+    
+    try:
+        result = _check_cached(session, service_url, content)
         format_toxicity_result(result)
         return result
         
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print_colored(f"❌ Error testing content: {str(e)}", Colors.FAIL)
         print()
         return None
 
-def test_batch_content(service_url: str) -> None:
+def test_batch_content(session: requests.Session, service_url: str) -> None:
     """Test batch processing of multiple contents."""
     print_header("📦 BATCH TESTING")
     test_messages = [
@@ -130,44 +296,28 @@ def test_batch_content(service_url: str) -> None:
         {"content": "You're being stupid about this", "description": "🚨 Insulting language"}
     ]
     
-    yeets = []
-    for i, msg in enumerate(test_messages):
-        yeets.append({
-            "content": msg["content"],
-            "yeet_id": f"batch-{i}-{int(time.time())}",
-            "user_id": "demo-user"
-        })
+    yeets = _build_yeets(test_messages, "batch")
     
     try:
-        payload = {"yeets": yeets}
-        response = requests.post(
-            f"{service_url}/api/moderation/batch",
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=60
-        )
-        response.raise_for_status()
-        
-        data = response.json()
-        print_colored(f"📊 Batch Results (Total: {data.get('total_processed', 'N/A')})", Colors.HEADER)
+        results = _chunked_batch(session, service_url, yeets)
+        print_colored(f"📊 Batch Results (Total: {len(results)})", Colors.HEADER)
         print()
         
-        results = data.get('results', [])
         for i, result in enumerate(results):
             if i < len(test_messages):
                 print_colored(f"[{i + 1}] {test_messages[i]['description']}", Colors.OKBLUE)
                 print_colored(f'Content: "{test_messages[i]["content"]}"', Colors.OKBLUE)
                 format_toxicity_result(result)
                 
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print_colored(f"❌ Error in batch testing: {str(e)}", Colors.FAIL)
 
-def run_demo_tests(service_url: str) -> None:
+def run_demo_tests(session: requests.Session, service_url: str, use_async: bool = False) -> None:
     """Run a comprehensive set of demo tests."""
     print_header("🚀 MODERATION SERVICE DEMO")
     
     # Test service health
-    if not test_service_health(service_url):
+    if not test_service_health(session, service_url):
         print_colored("Cannot proceed without healthy service. Please start the moderation service.", Colors.FAIL)
         return
     
@@ -186,21 +336,49 @@ def run_demo_tests(service_url: str) -> None:
         {"content": "F**k this s**t, you're all morons", "description": "🚨 Profanity + insults"}
     ]
     
+    contents = [test["content"] for test in test_cases]
+    
+    if use_async:
+        # Fire every single-content check concurrently
+        batch_results = asyncio.run(_async_check(service_url, contents))
+    else:
+        # Send the test cases through the batch endpoint instead of one request per case
+        try:
+            batch_results = _chunked_batch(session, service_url, _build_yeets(test_cases, "demo"))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print_colored(f"⚠️ Batch request failed ({str(e)}), checking contents individually", Colors.WARNING)
+            print()
+            batch_results = _parallel_check(session, service_url, contents)
+    
     results = []
-    for test in test_cases:
-        result = test_single_content(service_url, test["content"], test["description"])
-        if result:
-            results.append(result)
-        time.sleep(0.5)  # Small delay for readability
+    for test, result in zip(test_cases, batch_results):
+        print_colored(f"🧪 Testing: {test['description']}", Colors.HEADER)
+        print_colored(f'Content: "{test["content"]}"', Colors.OKBLUE)
+        print()
+        
+        if 'error' in result:
+            print_colored(f"❌ Error testing content: {result['error']}", Colors.FAIL)
+            print()
+            continue
+        
+        format_toxicity_result(result)
+        results.append(result)
     
     # Show summary statistics
     if results:
         print_header("📈 SUMMARY STATISTICS")
         total_tests = len(results)
-        toxic_count = sum(1 for r in results if r.get('is_toxic'))
+        
+        # Pull every field out in a single pass over the results
+        stats = np.fromiter(
+            ((bool(r.get('is_toxic')), r.get('toxicity_score', 0.0), r.get('confidence', 0.0)) for r in results),
+            dtype=[('is_toxic', '?'), ('score', 'f4'), ('confidence', 'f4')],
+            count=total_tests
+        )
+        toxic_count = int(stats['is_toxic'].sum())
         clean_count = total_tests - toxic_count
-        avg_score = sum(r.get('toxicity_score', 0) for r in results) / total_tests if total_tests > 0 else 0
-        avg_confidence = sum(r.get('confidence', 0) for r in results) / total_tests if total_tests > 0 else 0
+        avg_score = float(stats['score'].mean())
+        avg_confidence = float(stats['confidence'].mean())
         
         print_colored(f"Total Tests: {total_tests}", Colors.OKBLUE)
         print_colored(f"Clean Content: {clean_count} ({clean_count/total_tests*100:.1f}%)", Colors.OKGREEN)
@@ -210,9 +388,9 @@ def run_demo_tests(service_url: str) -> None:
         print()
     
     # Batch testing
-    test_batch_content(service_url)
+    test_batch_content(session, service_url)
 
-def start_interactive_mode(service_url: str) -> None:
+def start_interactive_mode(session: requests.Session, service_url: str) -> None:
     """Start interactive mode for user input."""
     print_header("🎮 INTERACTIVE MODE")
     print_colored("Enter text to check for toxicity. Type 'quit' to exit.", Colors.OKBLUE)
@@ -220,7 +398,7 @@ def start_interactive_mode(service_url: str) -> None:
     
     while True:
         try:
-            user_input = input(f"{Colors.HEADER}Enter content to analyze: {Colors.ENDC}")
+            user_input = input(colorize("Enter content to analyze: ", Colors.HEADER))
             
             if user_input.lower() in ['quit', 'exit', 'q']:
                 print_colored("👋 Goodbye!", Colors.OKGREEN)
@@ -231,7 +409,8 @@ def start_interactive_mode(service_url: str) -> None:
                 continue
             
             print()
-            test_single_content(service_url, user_input)
+            # Strip surrounding whitespace so re-entered text hits the cache
+            test_single_content(session, service_url, user_input.strip())
             
         except KeyboardInterrupt:
             print_colored("\n👋 Goodbye!", Colors.OKGREEN)
@@ -240,12 +419,12 @@ def start_interactive_mode(service_url: str) -> None:
             print_colored("\n👋 Goodbye!", Colors.OKGREEN)
             break
 
-def show_service_info(service_url: str) -> None:
+def show_service_info(session: requests.Session, service_url: str) -> None:
     """Show detailed service information."""
     print_header("ℹ️ SERVICE INFORMATION")
     
     try:
-        response = requests.get(f"{service_url}/api/moderation/info", timeout=10)
+        response = session.get(f"{service_url}/api/moderation/info", timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -264,9 +443,15 @@ def main():
     parser.add_argument("--url", default="http://localhost:5000", help="Service URL")
     parser.add_argument("--interactive", action="store_true", help="Start in interactive mode")
     parser.add_argument("--no-tests", action="store_true", help="Skip running demo tests")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Send demo checks as concurrent aiohttp requests instead of one batch")
     
     args = parser.parse_args()
     
+    if args.use_async and not AIOHTTP_AVAILABLE:
+        print_colored("⚠️ aiohttp is not installed, falling back to the batch endpoint", Colors.WARNING)
+        args.use_async = False
+    
     # Print banner
     print_colored("""
  ╔══════════════════════════════════════════════════════════════╗
@@ -280,20 +465,26 @@ def main():
     print_colored(f"🔗 Service URL: {args.url}", Colors.OKBLUE)
     print()
     
-    # Show service information
-    show_service_info(args.url)
-    
-    # Run tests if requested
-    if not args.no_tests:
-        run_demo_tests(args.url)
+    # One pooled session keeps connections alive across every request
+    session = _make_session()
     
-    # Start interactive mode if requested
-    if args.interactive:
-        start_interactive_mode(args.url)
-    else:
-        print()
-        print_colored("💡 Tip: Run with --interactive flag for interactive mode!", Colors.OKBLUE)
-        print_colored("💡 Example: python demo_moderation.py --interactive", Colors.OKBLUE)
+    try:
+        # Show service information
+        show_service_info(session, args.url)
+        
+        # Run tests if requested
+        if not args.no_tests:
+            run_demo_tests(session, args.url, args.use_async)
+        
+        # Start interactive mode if requested
+        if args.interactive:
+            start_interactive_mode(session, args.url)
+        else:
+            print()
+            print_colored("💡 Tip: Run with --interactive flag for interactive mode!", Colors.OKBLUE)
+            print_colored("💡 Example: python demo_moderation.py --interactive", Colors.OKBLUE)
+    finally:
+        session.close()
     
     print()
     print_colored("Demo completed! 🎉", Colors.OKGREEN)
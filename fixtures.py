@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Shared toxicity test cases
+
+Used by test_service_logic.py (TEST_CASES, scored as toxic/clean by the
+service's detector) and test_toxicity_model.py (MODEL_TEST_CASES, scored as
+NON_TOXIC/BORDERLINE/TOXIC from the raw model probability).
+"""
+
+from dataclasses import dataclass
+
+@dataclass(frozen=True, slots=True)
+class ToxCase:
+    """A service-level test message and whether the service should flag it"""
+    text: str
+    expected_toxic: bool
+    severity: str
+
+@dataclass(frozen=True, slots=True)
+class ModelCase:
+    """A model-level test text and its expected probability band"""
+    text: str
+    expected: str
+    category: str
+
+TEST_CASES = (
+    # Clean content
+    ToxCase("I love this beautiful day!", False, "✅ Clean"),
+    ToxCase("Thank you for your helpful feedback.", False, "✅ Clean"),
+    ToxCase("This is a great article about technology.", False, "✅ Clean"),
+    ToxCase("What a wonderful community we have here.", False, "✅ Clean"),
+    ToxCase("The weather forecast shows rain tomorrow.", False, "✅ Clean"),
+
+    # Borderline content
+    ToxCase("I disagree with this opinion.", False, "😐 Neutral"),
+    ToxCase("This is quite frustrating to deal with.", False, "😐 Neutral"),
+    ToxCase("You're being annoying.", True, "⚠️ Mild"),
+    ToxCase("That's a stupid idea.", True, "⚠️ Mild"),
+    ToxCase("This is dumb.", True, "⚠️ Mild"),
+
+    # Clearly toxic content
+    ToxCase("You're a complete idiot.", True, "🚨 Toxic"),
+    ToxCase("Go kill yourself.", True, "🚨 Toxic"),
+    ToxCase("I hate you so much.", True, "🚨 Toxic"),
+    ToxCase("You're worthless and should die.", True, "🚨 Toxic"),
+    ToxCase("F**k you, you piece of sh*t.", True, "🚨 Toxic"),
+    ToxCase("Nobody likes you, loser.", True, "🚨 Toxic"),
+)
+
+MODEL_TEST_CASES = (
+    # Clean content (should be NON-TOXIC)
+    ModelCase("I love this beautiful day!", "NON_TOXIC", "✅ Positive"),
+    ModelCase("Thank you for the helpful feedback.", "NON_TOXIC", "✅ Polite"),
+    ModelCase("This is a great article about technology.", "NON_TOXIC", "✅ Neutral"),
+    ModelCase("What a wonderful community we have here.", "NON_TOXIC", "✅ Appreciation"),
+    ModelCase("The weather forecast shows rain tomorrow.", "NON_TOXIC", "✅ Factual"),
+
+    # Mildly negative but not toxic
+    ModelCase("I disagree with this opinion.", "NON_TOXIC", "😐 Disagreement"),
+    ModelCase("This is quite frustrating to deal with.", "NON_TOXIC", "😐 Mild negative"),
+    ModelCase("I'm having a difficult day today.", "NON_TOXIC", "😐 Personal struggle"),
+
+    # Borderline toxic
+    ModelCase("You're being annoying.", "BORDERLINE", "⚠️ Mild insult"),
+    ModelCase("This is stupid.", "BORDERLINE", "⚠️ Mild profanity"),
+    ModelCase("That's a dumb idea.", "BORDERLINE", "⚠️ Criticism"),
+
+    # Clearly toxic content
+    ModelCase("You're a complete idiot.", "TOXIC", "🚨 Direct insult"),
+    ModelCase("Go kill yourself.", "TOXIC", "🚨 Self-harm suggestion"),
+    ModelCase("I hate you so much.", "TOXIC", "🚨 Hate speech"),
+    ModelCase("You're worthless and should die.", "TOXIC", "🚨 Severe harassment"),
+    ModelCase("F**k you, you piece of sh*t.", "TOXIC", "🚨 Profanity + insult"),
+    ModelCase("Nobody likes you, loser.", "TOXIC", "🚨 Bullying"),
+)
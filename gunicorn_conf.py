@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration for the Moderation Service
+
+Two worker processes (as the service previously ran) each with many threads:
+concurrent /check requests wait on their worker's micro-batching queue while
+others are enqueued, so they can be scored together in one model call. Each
+worker loads its own model copy.
+
+Usage:
+    gunicorn -c gunicorn_conf.py app:app
+"""
+
+import os
+
+# Run from src/ so the app's top-level imports (endpoints, services) resolve
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = "gthread"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+
+# Longer timeout for ML model loading
+timeout = 120
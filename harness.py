@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP helpers for the moderation service test scripts
+
+Used by test_api_endpoints.py, test_service.py and test_fix.py (and for result
+files by test_service_logic.py and test_toxicity_model.py). The module is
+fully type-annotated so it can be compiled with mypyc (``mypyc harness.py``)
+when the request loop needs to be faster; the plain Python module works as-is.
+"""
+
+import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def _numpy_default(value: Any) -> Any:
+    """Strict fallback encoder: numpy arrays/scalars via tolist(), anything else is an error."""
+    tolist = getattr(value, 'tolist', None)
+    if callable(tolist):
+        return tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _json_default(value: Any) -> Any:
+    """Fallback encoder: numpy arrays/scalars via tolist(), anything else via str()."""
+    try:
+        return _numpy_default(value)
+    except TypeError:
+        return str(value)
+
+def dumps(payload: Any, indent: bool = False, strict: bool = False) -> bytes:
+    """
+    Serialize JSON (compact, or 2-space indented), using orjson when it is installed.
+
+    numpy values are always encoded natively; other unsupported values are
+    stringified unless strict, in which case they raise TypeError.
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(payload, option=option, default=None if strict else str)
+    default = _numpy_default if strict else _json_default
+    if indent:
+        return json.dumps(payload, indent=2, default=default).encode('utf-8')
+    return json.dumps(payload, separators=(',', ':'), default=default).encode('utf-8')
+
+def loads(body: bytes) -> Any:
+    """Parse a JSON response body, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(body)
+    return json.loads(body)
+
+def preview(response: requests.Response, limit: int = 200) -> str:
+    """Decode only the first limit bytes of a response body for error output."""
+    return response.content[:limit].decode('utf-8', 'replace')
+
+# Default connections kept per host; run_cases uses as many workers by default
+POOL_MAXSIZE = 16
+
+def make_session(pool_connections: int = 4, pool_maxsize: int = POOL_MAXSIZE,
+                 headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """Create a keep-alive JSON session with a connection pool."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'Content-Type': 'application/json'})
+    if headers:
+        session.headers.update(headers)
+    return session
+
+def timed_post(session: requests.Session, url: str, body: bytes,
+               timeout: float = 30) -> Tuple[requests.Response, float]:
+    """POST a pre-encoded JSON body; returns (response, seconds)."""
+    start_ns = time.perf_counter_ns()
+    response = session.post(url, data=body, timeout=timeout)
+    return response, (time.perf_counter_ns() - start_ns) / 1e9
+
+def run_cases(session: requests.Session, url: str, bodies: Sequence[bytes],
+              timeout: float = 30, max_workers: int = POOL_MAXSIZE) -> List[Future]:
+    """
+    POST every body concurrently.
+
+    The service speaks HTTP/1.1 (gunicorn), so each in-flight request needs
+    its own keep-alive connection; pass the session's pool_maxsize as
+    max_workers so connections are reused rather than opened and discarded.
+
+    Returns completed futures in input order; each yields (response, seconds)
+    or raises the request's exception from result().
+    """
+    workers = max(1, min(max_workers, len(bodies)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return [executor.submit(timed_post, session, url, body, timeout) for body in bodies]
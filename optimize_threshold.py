@@ -41,47 +41,40 @@ def optimize_threshold():
     print("🎯 THRESHOLD OPTIMIZATION")
     print("=" * 60)
     
-    # Initialize detector
-    detector = ToxicityDetector(use_ml_model=True)
+    # Initialize detector; every case must get a real model score, so no clean fast path
+    detector = ToxicityDetector(use_ml_model=True, use_fast_path=False)
     
-    # Get toxicity scores for all test cases
-    scores = []
-    labels = []
-    
-    for test_case in test_cases:
-        result = detector.check_toxicity(test_case["content"])
-        scores.append(result["toxicity_score"])
-        labels.append(test_case["label"])
-    
-    scores = np.array(scores)
-    labels = np.array(labels)
+    # Get toxicity scores for all test cases in one batched pass
+    results = detector.check_toxicity_batch([test_case["content"] for test_case in test_cases])
+    scores = np.fromiter((result["toxicity_score"] for result in results), dtype=np.float64, count=len(results))
+    labels = np.array([test_case["label"] for test_case in test_cases], dtype=bool)
     
     # Test different thresholds
     thresholds = np.arange(0.45, 0.75, 0.01)
-    best_threshold = 0.5
-    best_accuracy = 0
+    
+    # Evaluate every threshold at once: rows are thresholds, columns are test cases
+    predictions = scores[None, :] >= thresholds[:, None]
+    actual = labels[None, :]
+    
+    # Calculate metrics
+    tp = (predictions & actual).sum(axis=1)    # True Positives
+    fp = (predictions & ~actual).sum(axis=1)   # False Positives
+    tn = (~predictions & ~actual).sum(axis=1)  # True Negatives
+    fn = (~predictions & actual).sum(axis=1)   # False Negatives
+    
+    accuracy = (tp + tn) / len(labels)
+    precision = np.divide(tp, tp + fp, out=np.zeros(len(thresholds)), where=(tp + fp) > 0)
+    recall = np.divide(tp, tp + fn, out=np.zeros(len(thresholds)), where=(tp + fn) > 0)
+    
+    best_idx = int(accuracy.argmax())
+    best_threshold = float(thresholds[best_idx])
+    best_accuracy = float(accuracy[best_idx])
     
     print(f"{'Threshold':<12} {'Accuracy':<10} {'TP':<4} {'FP':<4} {'TN':<4} {'FN':<4} {'Precision':<10} {'Recall':<8}")
     print("-" * 60)
     
-    for threshold in thresholds:
-        predictions = scores >= threshold
-        
-        # Calculate metrics
-        tp = np.sum((predictions == True) & (labels == True))   # True Positives
-        fp = np.sum((predictions == True) & (labels == False))  # False Positives  
-        tn = np.sum((predictions == False) & (labels == False)) # True Negatives
-        fn = np.sum((predictions == False) & (labels == True))  # False Negatives
-        
-        accuracy = (tp + tn) / len(labels)
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0
-        recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-        
-        print(f"{threshold:<12.3f} {accuracy:<10.3f} {tp:<4} {fp:<4} {tn:<4} {fn:<4} {precision:<10.3f} {recall:<8.3f}")
-        
-        if accuracy > best_accuracy:
-            best_accuracy = accuracy
-            best_threshold = threshold
+    for i, threshold in enumerate(thresholds):
+        print(f"{threshold:<12.3f} {accuracy[i]:<10.3f} {tp[i]:<4} {fp[i]:<4} {tn[i]:<4} {fn[i]:<4} {precision[i]:<10.3f} {recall[i]:<8.3f}")
     
     print("-" * 60)
     print(f"🏆 Best threshold: {best_threshold:.3f} (accuracy: {best_accuracy:.3f})")
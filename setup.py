@@ -8,13 +8,15 @@ import os
 import sys
 import subprocess
 import shutil
+import importlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def run_command(command, description):
-    """Run a command and return success status"""
+def run_command(argv, description, env=None):
+    """Run a command (given as an argv list, no shell) and return success status"""
     print(f"  Running: {description}")
     try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        result = subprocess.run(argv, capture_output=True, text=True, check=False, env=env)
         if result.returncode == 0:
             print(f"  ✓ {description} completed successfully")
             return True
@@ -44,9 +46,11 @@ def install_dependencies():
         print("  ❌ requirements.txt not found")
         return False
     
+    # Prefer wheels over source builds and skip install-time bytecode compilation
     return run_command(
-        f"{sys.executable} -m pip install -r requirements.txt",
-        "Installing Python dependencies"
+        [sys.executable, "-m", "pip", "install", "--prefer-binary", "--no-compile", "-r", "requirements.txt"],
+        "Installing Python dependencies",
+        env={**os.environ, "PIP_DISABLE_PIP_VERSION_CHECK": "1"}
     )
 
 def create_directories():
@@ -92,13 +96,19 @@ def test_imports():
     
     all_imports_ok = True
     
-    for module, description in required_modules:
-        try:
-            __import__(module)
+    # Import concurrently so the heavy native libraries load in parallel
+    with ThreadPoolExecutor(max_workers=len(required_modules)) as executor:
+        futures = [executor.submit(importlib.import_module, module) for module, _ in required_modules]
+    
+    # Report in the original order
+    for (module, description), future in zip(required_modules, futures):
+        if future.exception() is None:
             print(f"  ✓ {description} imported successfully")
-        except ImportError:
+        elif isinstance(future.exception(), ImportError):
             print(f"  ❌ Failed to import {module} ({description})")
             all_imports_ok = False
+        else:
+            raise future.exception()
     
     return all_imports_ok
 
@@ -112,7 +122,7 @@ def test_custom_model():
         return False
     
     return run_command(
-        f"{sys.executable} test_custom_model.py",
+        [sys.executable, "test_custom_model.py"],
         "Testing custom model functionality"
     )
 
@@ -126,7 +136,7 @@ def run_basic_service_test():
         return False
     
     return run_command(
-        f"{sys.executable} test_service.py",
+        [sys.executable, "test_service.py"],
         "Running basic service tests"
     )
 
@@ -1,53 +1,113 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import os
+import logging
+import threading
+import time
 from dotenv import load_dotenv
 from endpoints.yeet_check import yeet_check_bp
 from services.toxicity_detector import ToxicityDetector
+from services.batched_detector import BatchedDetector
+from utils.json_provider import ORJSONProvider, ORJSON_AVAILABLE
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 CORS(app)
 
+# Use orjson for all jsonify() responses and request parsing when available
+if ORJSON_AVAILABLE:
+    app.json = ORJSONProvider(app)
+
 # Initialize toxicity detector based on environment settings
 use_ml_model = os.environ.get('USE_ML_MODEL', 'true').lower() == 'true'
 toxicity_detector = ToxicityDetector(use_ml_model=use_ml_model)
 
-# Make detector available to blueprints
-app.config['TOXICITY_DETECTOR'] = toxicity_detector
+# Run a few dummy inferences so the first real request doesn't pay for model warm-up
+if toxicity_detector.use_ml_model and os.environ.get('WARMUP_MODEL', 'true').lower() == 'true':
+    try:
+        toxicity_detector.warm_up()
+    except Exception as e:
+        logger.warning(f"Model warm-up failed: {str(e)}")
+
+# Coalesce concurrent single checks into batched model calls
+if toxicity_detector.use_ml_model and os.environ.get('MICRO_BATCHING', 'true').lower() == 'true':
+    request_detector = BatchedDetector(
+        toxicity_detector,
+        max_batch_size=int(os.environ.get('MICRO_BATCH_MAX_SIZE', 16)),
+        batch_timeout_ms=float(os.environ.get('MICRO_BATCH_TIMEOUT_MS', 5)),
+        result_timeout=float(os.environ.get('MICRO_BATCH_RESULT_TIMEOUT', 30))
+    )
+else:
+    request_detector = toxicity_detector
+
+# Make detector available to blueprints (attribute access is cheaper than a config lookup per request)
+app.toxicity_detector = request_detector
+app.config['TOXICITY_DETECTOR'] = request_detector
 
 # Register blueprints
 app.register_blueprint(yeet_check_bp, url_prefix='/api/moderation')
 
+# Short-lived cache for detector info served to frequent health/info probes
+INFO_CACHE_TTL = 5
+_response_cache = {}
+_response_cache_lock = threading.Lock()
+
+def _cached(key, ttl, producer):
+    """Return producer()'s value, reusing it for ttl seconds"""
+    now = time.monotonic()
+    with _response_cache_lock:
+        value, expires_at = _response_cache.get(key, (None, 0))
+    if now < expires_at:
+        return value
+    value = producer()
+    with _response_cache_lock:
+        _response_cache[key] = (value, now + ttl)
+    return value
+
+# Static response bodies, encoded once at import time
+_HEALTH_BASE = {
+    'status': 'healthy',
+    'service': 'moderation-service',
+    'version': '1.0.0'
+}
+
+_ROOT_BODY = app.json.dumps({
+    'message': 'Moderation Service API',
+    'version': '1.0.0',
+    'endpoints': [
+        '/health - Health check',
+        '/api/moderation/check - Check if content is toxic',
+        '/api/moderation/batch - Batch check multiple contents'
+    ]
+}).encode('utf-8')
+
+def _build_health_body():
+    """Encode the health payload with the current detector info"""
+    detector_info = _cached('detector_info', INFO_CACHE_TTL, toxicity_detector.get_detector_info)
+    return app.json.dumps({**_HEALTH_BASE, 'detector': detector_info}).encode('utf-8')
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    detector_info = toxicity_detector.get_detector_info()
-    return jsonify({
-        'status': 'healthy',
-        'service': 'moderation-service',
-        'version': '1.0.0',
-        'detector': detector_info
-    }), 200
+    body = _cached('health_body', INFO_CACHE_TTL, _build_health_body)
+    response = Response(body, mimetype='application/json')
+    response.headers['Cache-Control'] = f'max-age={INFO_CACHE_TTL}'
+    return response, 200
 
 @app.route('/', methods=['GET'])
 def root():
-    return jsonify({
-        'message': 'Moderation Service API',
-        'version': '1.0.0',
-        'endpoints': [
-            '/health - Health check',
-            '/api/moderation/check - Check if content is toxic',
-            '/api/moderation/batch - Batch check multiple contents'
-        ]
-    }), 200
+    return Response(_ROOT_BODY, mimetype='application/json', status=200)
 
 @app.route('/api/moderation/info', methods=['GET'])
 def detector_info():
     """Get information about the toxicity detector"""
-    info = toxicity_detector.get_detector_info()
-    return jsonify(info), 200
+    info = _cached('detector_info', INFO_CACHE_TTL, toxicity_detector.get_detector_info)
+    response = jsonify(info)
+    response.headers['Cache-Control'] = f'max-age={INFO_CACHE_TTL}'
+    return response, 200
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
@@ -67,8 +67,8 @@ def check_yeet_toxicity():
                 'error': 'Invalid user_id format'
             }), 400
         
-        # Get toxicity detector from app config
-        toxicity_detector = current_app.config['TOXICITY_DETECTOR']
+        # Get toxicity detector bound to the app
+        toxicity_detector = current_app.toxicity_detector
         
         # Check toxicity
         logger.info(f"Checking toxicity for content: {content[:50]}...")
@@ -112,8 +112,8 @@ def check_batch_toxicity():
     }
     """
     try:
-        # Get toxicity detector from app config
-        toxicity_detector = current_app.config['TOXICITY_DETECTOR']
+        # Get toxicity detector bound to the app
+        toxicity_detector = current_app.toxicity_detector
         
         if not request.is_json:
             return jsonify({
@@ -139,32 +139,37 @@ def check_batch_toxicity():
                 'error': 'Batch size cannot exceed 100 yeets'
             }), 400
         
-        results = []
-        
-        # Get the shared toxicity detector instance
-        detector = current_app.config['TOXICITY_DETECTOR']
+        results = [None] * len(yeets)
+        pending = []
         
         for i, yeet in enumerate(yeets):
             if 'content' not in yeet:
-                results.append({
+                results[i] = {
                     'error': f'Missing content for yeet at index {i}',
                     'yeet_id': yeet.get('yeet_id'),
                     'user_id': yeet.get('user_id')
-                })
-                continue
-            
-            try:
-                result = detector.check_toxicity(yeet['content'])
-                result['yeet_id'] = yeet.get('yeet_id')
-                result['user_id'] = yeet.get('user_id')
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error checking toxicity for yeet {i}: {str(e)}")
-                results.append({
-                    'error': f'Failed to check toxicity: {str(e)}',
+                }
+            elif not yeet['content'] or not isinstance(yeet['content'], str):
+                results[i] = {
+                    'error': 'Failed to check toxicity: Content must be a non-empty string',
                     'yeet_id': yeet.get('yeet_id'),
                     'user_id': yeet.get('user_id')
-                })
+                }
+            else:
+                pending.append(i)
+        
+        # Score all valid yeets with a single batched detector call
+        if pending:
+            try:
+                batch_results = toxicity_detector.check_toxicity_batch([yeets[i]['content'] for i in pending])
+            except Exception as e:
+                logger.error(f"Error checking toxicity for batch: {str(e)}")
+                batch_results = [{'error': f'Failed to check toxicity: {str(e)}'} for _ in pending]
+            
+            for i, result in zip(pending, batch_results):
+                result['yeet_id'] = yeets[i].get('yeet_id')
+                result['user_id'] = yeets[i].get('user_id')
+                results[i] = result
         
         return jsonify({
             'results': results,
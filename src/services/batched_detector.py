@@ -0,0 +1,100 @@
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+class BatchedDetector:
+    """
+    Coalesces concurrent single-content checks into batched model calls
+
+    Each check_toxicity() call enqueues its content and blocks on a Future.
+    A background worker drains up to max_batch_size queued items, or whatever
+    arrived within batch_timeout_ms of the first one, and scores them with a
+    single check_toxicity_batch() call. All other detector attributes are
+    delegated to the wrapped detector.
+    """
+
+    def __init__(self, detector, max_batch_size: int = 16, batch_timeout_ms: float = 5,
+                 result_timeout: float = 30):
+        """
+        Args:
+            detector (ToxicityDetector): The detector used to score batches
+            max_batch_size (int): Maximum number of contents per model call
+            batch_timeout_ms (float): How long to wait for more contents after the first
+            result_timeout (float): Seconds a caller waits for its batch before giving up
+        """
+        self.detector = detector
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_timeout = batch_timeout_ms / 1000.0
+        self.result_timeout = result_timeout
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.detector, name)
+
+    def check_toxicity(self, content: str) -> Dict:
+        """
+        Check content for toxicity as part of the next micro-batch
+
+        Args:
+            content (str): The text content to analyze
+
+        Returns:
+            Dict: Analysis result containing toxicity information
+        """
+        # Validate up front so one bad item can't fail a whole batch
+        if not content or not isinstance(content, str):
+            raise ValueError("Content must be a non-empty string")
+
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((content, future))
+        # A stalled worker must not hang request threads indefinitely
+        return future.result(timeout=self.result_timeout)
+
+    def _ensure_worker(self):
+        """Start the batching thread on first use (after any worker process fork)"""
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="toxicity-batcher", daemon=True)
+                self._worker.start()
+                logger.info(f"Micro-batching enabled (max_batch_size={self.max_batch_size}, "
+                            f"timeout={self.batch_timeout * 1000:.1f}ms)")
+
+    def _collect_batch(self):
+        """Block for one item, then gather more until the batch is full or the timeout expires"""
+        items = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_timeout
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        """Worker loop: score each collected batch and resolve its futures"""
+        while True:
+            items = self._collect_batch()
+            contents = [content for content, _ in items]
+            try:
+                results = self.detector.check_toxicity_batch(contents)
+            except Exception as e:
+                logger.error(f"Batched toxicity check failed: {str(e)}")
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(items, results):
+                future.set_result(result)
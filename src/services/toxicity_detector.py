@@ -1,7 +1,12 @@
 import re
+import string
 import logging
 import json
-from datetime import datetime
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, List, Tuple
 import os
 import numpy as np
@@ -15,17 +20,131 @@ except ImportError:
     TRANSFORMERS_AVAILABLE = False
     logging.warning("Transformers library not available. Falling back to rule-based detection.")
 
+try:
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Content cleaning patterns, compiled once at import time
+_WHITESPACE_RE = re.compile(r'\s+')
+_ML_SPECIAL_CHARS_RE = re.compile(r'[^\w\s\.\!\?\,\;\:\-\'\"]')
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9\s]')
+# ASCII characters _clean_content_for_ml leaves untouched (single spaces only)
+_ML_SAFE_ASCII = string.ascii_letters + string.digits + "_ .!?,;:-'\""
+
+# Common character obfuscations (leetspeak) mapped back to letters
+_LEET_TABLE = str.maketrans({
+    '4': 'a', '@': 'a',
+    '3': 'e',
+    '1': 'i', '!': 'i',
+    '0': 'o',
+    '5': 's', '$': 's'
+})
+
+# Maximum number of contents per model forward pass in batch inference
+ML_BATCH_SIZE = 16
+
+# Number of tokenized single contents kept for reuse
+TOKENIZE_CACHE_SIZE = 4096
+
+# Number of single-content raw model logits kept for reuse
+RAW_LOGIT_CACHE_SIZE = 1024
+
+# Short ML-mode content containing none of these fragments (or masking
+# characters such as "f**k") is scored clean without running the model
+FAST_PATH_MAX_LENGTH = 80
+FAST_PATH_LEXICON = [
+    # Profanity
+    'fuck', 'shit', 'damn', 'bitch', 'ass', 'bastard', 'cunt', 'dick', 'piss', 'crap', 'hell',
+    'slut', 'whore', 'nigg', 'fag', 'retard',
+    # Threats and hate
+    'kill', 'die', 'dead', 'death', 'murder', 'suicide', 'kys', 'hate', 'hurt', 'destroy',
+    'eliminate', 'cancer',
+    # Insults and harassment
+    'stupid', 'idiot', 'moron', 'dumb', 'loser', 'pathetic', 'worthless', 'trash', 'garbage',
+    'ugly', 'disgusting', 'useless', 'annoying', 'shut up', 'freak', 'scum', 'jerk', 'sucks',
+]
+_FAST_PATH_PATTERN = re.compile(
+    '|'.join(re.escape(word) for word in FAST_PATH_LEXICON) + r'|[*@$0-9]',
+    re.IGNORECASE
+)
+
+# Keywords used to label ML-detected toxicity, in reporting order
+ML_CATEGORY_KEYWORDS = {
+    'profanity': ['fuck', 'shit', 'damn', 'bitch', 'asshole'],
+    'hate_speech': ['hate', 'kill', 'die', 'murder'],
+    'harassment': ['stupid', 'idiot', 'moron', 'loser', 'pathetic'],
+    'threat': ['kill you', 'hurt you', 'destroy you', 'eliminate'],
+}
+# Each keyword also implies the categories of any keyword it contains ("kill you" -> "kill")
+_KEYWORD_CATEGORIES = {
+    keyword: {category for category, words in ML_CATEGORY_KEYWORDS.items() for word in words if word in keyword}
+    for keywords in ML_CATEGORY_KEYWORDS.values() for keyword in keywords
+}
+# Zero-width lookahead finds overlapping keywords in a single scan; longest alternatives first
+_CATEGORY_KEYWORD_PATTERN = re.compile(
+    '(?=(' + '|'.join(re.escape(keyword) for keyword in sorted(_KEYWORD_CATEGORIES, key=len, reverse=True)) + '))'
+)
+
+# (epoch second, ISO string) of the last formatted timestamp
+_timestamp_cache = (0, '')
+
+def _utc_timestamp() -> str:
+    """Current UTC time as a second-precision ISO string, formatted at most once per second"""
+    global _timestamp_cache
+    now = int(time.time())
+    cached_second, cached_iso = _timestamp_cache
+    if now != cached_second:
+        cached_iso = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now))
+        # Tuple swap keeps second and string consistent across request threads
+        _timestamp_cache = (now, cached_iso)
+    return cached_iso
+
+def _sigmoid(x: float) -> float:
+    """Numerically stable logistic function for a single Python float"""
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
+
+def half_precision_dtype(device_type: str):
+    """Return the fastest supported half-precision dtype for a torch device type, or None"""
+    if device_type == "cuda":
+        return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    # Only cast on CPUs with native BF16 instructions; emulated BF16 is slower than FP32
+    is_bf16_supported = getattr(torch.cpu, "_is_avx512_bf16_supported", None)
+    if is_bf16_supported is not None and is_bf16_supported():
+        return torch.bfloat16
+    return None
+
 class ToxicityDetector:
-    def __init__(self, use_ml_model=True):
+    def __init__(self, use_ml_model=True, backend=None, use_fast_path=None):
         """
         Initialize the toxicity detector
         
         Args:
             use_ml_model (bool): Whether to use ML model or fall back to rule-based
+            backend (str): ML inference backend, "pytorch" or "onnx" (defaults to the USE_ONNX setting)
+            use_fast_path (bool): Score short lexicon-free content as clean without the model
+                (defaults to the CLEAN_FAST_PATH setting, off unless enabled)
         """
         self.use_ml_model = use_ml_model and TRANSFORMERS_AVAILABLE
+        if backend is None:
+            backend = "onnx" if os.getenv("USE_ONNX", "false").lower() == "true" else "pytorch"
+        self.backend = backend
+        if use_fast_path is None:
+            use_fast_path = os.getenv("CLEAN_FAST_PATH", "false").lower() == "true"
+        self.use_fast_path = use_fast_path
+        
+        # Recent non-toxic ML results, reused for repeated content
+        self.safe_cache_size = int(os.getenv("SAFE_RESULT_CACHE_SIZE", 10000))
+        self._safe_cache = OrderedDict()
+        self._safe_cache_lock = threading.Lock()
         
         if self.use_ml_model:
             self._initialize_ml_model()
@@ -51,7 +170,7 @@ class ToxicityDetector:
             if os.path.exists(model_path) and os.path.isdir(model_path):
                 logger.info(f"Found local model at {model_path}")
                 # Load tokenizer and model from local directory
-                self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+                self.tokenizer = AutoTokenizer.from_pretrained(model_path, use_fast=True)
                 self.model = AutoModelForSequenceClassification.from_pretrained(model_path)
                 
                 # Load model configuration for threshold and max_length
@@ -74,13 +193,15 @@ class ToxicityDetector:
 
                 # NOTE: Direct inference will be used instead of pipeline
                 self.classifier = None
+                model_source = model_path
             else:
                 logger.warning(f"Local model not found at {model_path}")
                 logger.info("Attempting to load from Hugging Face Hub")
                 # Fallback to loading from Hugging Face Hub
                 self.tokenizer = AutoTokenizer.from_pretrained(
                     model_name,
-                    cache_dir=model_cache_dir
+                    cache_dir=model_cache_dir,
+                    use_fast=True
                 )
                 self.model = AutoModelForSequenceClassification.from_pretrained(
                     model_name,
@@ -96,6 +217,26 @@ class ToxicityDetector:
                 framework="pt",  # Use PyTorch
                 device=device  # Use GPU if available and requested, otherwise CPU
             )
+                model_source = model_name
+            
+            # Repeated content (reposts, spam) reuses its tokenized inputs
+            self._tokenize_cached = lru_cache(maxsize=TOKENIZE_CACHE_SIZE)(self._tokenize)
+            # Repeated single checks (toxic ones included) skip the forward pass entirely
+            self._raw_logit_cached = lru_cache(maxsize=RAW_LOGIT_CACHE_SIZE)(self._raw_logit)
+            
+            # Reusable device buffers for single-content inputs on GPU
+            self._input_buffers = {}
+            self._input_buffer_lock = threading.Lock()
+            
+            # Optionally serve inference from an INT8-quantized ONNX Runtime session
+            self.ort_session = None
+            self.quantized = False
+            if self.backend == "onnx":
+                onnx_dir = os.path.join(model_cache_dir, f"{model_name}-onnx-int8")
+                self._initialize_onnx_session(model_source, onnx_dir)
+            
+            if self.ort_session is None:
+                self._optimize_torch_model()
             
             # Define toxicity categories based on model outputs
             self.toxicity_categories = {
@@ -115,6 +256,111 @@ class ToxicityDetector:
             self.use_ml_model = False
             self._initialize_rule_based()
     
+    def _initialize_onnx_session(self, model_source: str, onnx_dir: str):
+        """Export the model to ONNX, quantize it to INT8 and open an ONNX Runtime session"""
+        if not ONNX_AVAILABLE:
+            logger.warning("ONNX backend requested but optimum[onnxruntime] is not installed. Using PyTorch inference.")
+            return
+        
+        try:
+            quantized_path = os.path.join(onnx_dir, "model_quantized.onnx")
+            
+            # Export and quantize once; later starts reuse the saved model
+            if not os.path.exists(quantized_path):
+                logger.info(f"Exporting model to ONNX with dynamic INT8 quantization: {onnx_dir}")
+                ort_model = ORTModelForSequenceClassification.from_pretrained(model_source, export=True)
+                ort_model.save_pretrained(onnx_dir)
+                quantizer = ORTQuantizer.from_pretrained(ort_model)
+                quantizer.quantize(
+                    save_dir=onnx_dir,
+                    quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+                )
+            
+            sess_options = ort.SessionOptions()
+            sess_options.intra_op_num_threads = os.cpu_count()
+            sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.ort_session = ort.InferenceSession(
+                quantized_path,
+                sess_options,
+                providers=["CPUExecutionProvider"]
+            )
+            self.ort_input_names = [model_input.name for model_input in self.ort_session.get_inputs()]
+            self.quantized = True
+            logger.info(f"ONNX Runtime INT8 session loaded from {quantized_path}")
+            
+        except Exception as e:
+            logger.error(f"Failed to initialize ONNX Runtime session: {str(e)}")
+            logger.info("Using PyTorch inference")
+            self.ort_session = None
+    
+    def _optimize_torch_model(self):
+        """Prepare the PyTorch model for fast inference (fused attention, optional torch.compile)"""
+        torch.set_num_threads(int(os.getenv("TORCH_NUM_THREADS", os.cpu_count())))
+        self.model.eval()
+        # Weights never need gradients; unlike set_grad_enabled() this holds on every request thread
+        self.model.requires_grad_(False)
+        
+        # Dynamic INT8 quantization of Linear layers (CPU only); must happen before any kernel swaps
+        quantized = False
+        if os.getenv("TORCH_DYNAMIC_QUANT", "false").lower() == "true":
+            quantized = self._quantize_dynamic()
+        self.quantized = quantized
+        
+        # BetterTransformer swaps in fused attention kernels; not every model/version supports it
+        if hasattr(self.model, "to_bettertransformer"):
+            try:
+                self.model = self.model.to_bettertransformer()
+                logger.info("BetterTransformer fused kernels enabled")
+            except Exception as e:
+                logger.info(f"BetterTransformer not applied: {str(e)}")
+        
+        # Half precision halves memory traffic on hardware with native BF16/FP16 support
+        if not quantized and os.getenv("TORCH_HALF_PRECISION", "false").lower() == "true":
+            infer_dtype = half_precision_dtype(self.model.device.type)
+            if infer_dtype is not None:
+                self.model = self.model.to(dtype=infer_dtype)
+                logger.info(f"Running PyTorch inference in {infer_dtype}")
+            else:
+                logger.info("No native half-precision support detected; keeping FP32")
+        
+        # Compiled models pad sequences up to a multiple of this length so they see few distinct shapes
+        self.compile_pad_multiple = 0
+        if os.getenv("TORCH_COMPILE", "false").lower() != "true":
+            return
+        
+        eager_model = self.model
+        pad_multiple = int(os.getenv("TORCH_COMPILE_PAD_MULTIPLE", 32))
+        try:
+            self.model = torch.compile(self.model, mode="reduce-overhead", dynamic=True, fullgraph=False)
+            # Compile now for a short and a long sequence so requests don't pay for it
+            for seq_len in (max(pad_multiple, 8), 128):
+                dummy = torch.ones((1, seq_len), dtype=torch.long, device=eager_model.device)
+                with torch.inference_mode():
+                    self.model(input_ids=dummy, attention_mask=dummy)
+            self.compile_pad_multiple = pad_multiple
+            logger.info("PyTorch model compiled with torch.compile")
+        except Exception as e:
+            logger.error(f"torch.compile failed: {str(e)}")
+            logger.info("Using eager PyTorch inference")
+            self.model = eager_model
+    
+    def _quantize_dynamic(self) -> bool:
+        """Swap the model's Linear layers for dynamically quantized INT8 ones; returns whether it succeeded"""
+        if self.model.device.type != "cpu":
+            logger.info("Dynamic quantization is CPU-only; skipping")
+            return False
+        
+        try:
+            # FBGEMM has the fastest INT8 GEMM kernels on x86
+            if "fbgemm" in torch.backends.quantized.supported_engines:
+                torch.backends.quantized.engine = "fbgemm"
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+            logger.info(f"PyTorch model dynamically quantized to INT8 ({torch.backends.quantized.engine})")
+            return True
+        except Exception as e:
+            logger.error(f"Dynamic quantization failed: {str(e)}")
+            return False
+    
     def _initialize_rule_based(self):
         """Initialize rule-based toxicity detection as fallback"""
         self.toxic_patterns = [
@@ -132,6 +378,8 @@ class ToxicityDetector:
         
         # Compile patterns for better performance
         self.compiled_patterns = [re.compile(pattern, re.IGNORECASE) for pattern in self.toxic_patterns]
+        # All patterns in one alternation: a single scan tells whether anything matches at all
+        self.combined_pattern = re.compile('|'.join(f'(?:{pattern})' for pattern in self.toxic_patterns), re.IGNORECASE)
         
         # Toxicity categories for rule-based
         self.toxicity_categories = {
@@ -149,6 +397,15 @@ class ToxicityDetector:
             'toxic_behavior': 0.5
         }
         
+        # Pattern -> category membership matrix so match scoring is a single vectorized step
+        self._score_categories = sorted(self.toxicity_categories)
+        self._category_weights = np.array([self.severity_weights[category] for category in self._score_categories])
+        self._pattern_category_matrix = np.zeros((len(self.toxic_patterns), len(self._score_categories)), dtype=np.int64)
+        for j, category in enumerate(self._score_categories):
+            for pattern_index in self.toxicity_categories[category]:
+                if pattern_index < len(self.toxic_patterns):
+                    self._pattern_category_matrix[pattern_index, j] = 1
+        
         logger.info("Rule-based toxicity detector initialized")
     
     def check_toxicity(self, content: str) -> Dict:
@@ -165,71 +422,304 @@ class ToxicityDetector:
             raise ValueError("Content must be a non-empty string")
         
         if self.use_ml_model:
-            return self._check_toxicity_ml(content)
+            if self._is_obviously_clean(content):
+                return self._build_ml_result(content, content, 0.0)
+            result = self._cached_safe_result(content)
+            if result is None:
+                result = self._check_toxicity_ml(content)
+                self._remember_safe_result(content, result)
+            return result
         else:
             return self._check_toxicity_rule_based(content)
     
+    def check_toxicity_batch(self, contents: List[str], batch_size: int = ML_BATCH_SIZE) -> List[Dict]:
+        """
+        Check multiple contents for toxicity in a single pass
+        
+        Repeated contents are scored once, so a batch of one repeated text runs a
+        single model row; use warm_up() to exercise batch-shaped forward passes.
+        
+        Args:
+            contents (List[str]): The text contents to analyze
+            batch_size (int): Maximum rows per model forward pass (ML model only)
+            
+        Returns:
+            List[Dict]: Analysis results in the same order as contents
+        """
+        for content in contents:
+            if not content or not isinstance(content, str):
+                raise ValueError("Content must be a non-empty string")
+        
+        if not contents:
+            return []
+        
+        if self.use_ml_model:
+            results = [None] * len(contents)
+            # Distinct content still needing the model -> indices of every occurrence
+            pending = {}
+            for i, content in enumerate(contents):
+                if self._is_obviously_clean(content):
+                    results[i] = self._build_ml_result(content, content, 0.0)
+                elif content in pending:
+                    pending[content].append(i)
+                else:
+                    results[i] = self._cached_safe_result(content)
+                    if results[i] is None:
+                        pending[content] = [i]
+            
+            # Only content that might be toxic goes through the model, once per distinct content
+            if pending:
+                model_results = self._check_toxicity_ml_batch(list(pending), batch_size)
+                for (content, indices), result in zip(pending.items(), model_results):
+                    self._remember_safe_result(content, result)
+                    results[indices[0]] = result
+                    for i in indices[1:]:
+                        results[i] = {**result, 'categories': list(result['categories'])}
+            return results
+        else:
+            # Score each distinct content once; repeats get their own copy of the result
+            scored = {}
+            results = []
+            for content in contents:
+                result = scored.get(content)
+                if result is None:
+                    result = scored[content] = self._check_toxicity_rule_based(content)
+                    results.append(result)
+                else:
+                    results.append({**result, 'categories': list(result['categories'])})
+            return results
+    
+    def _is_obviously_clean(self, content: str) -> bool:
+        """Whether content has no words, or (with the fast path on) is short and contains nothing worth running the model on"""
+        # Emoji, numbers and punctuation alone carry nothing for the model to score
+        # (cleaning leaves it only digits and whitespace), so this holds even with the fast path off
+        if not any(map(str.isalpha, content)):
+            return True
+        return (
+            self.use_fast_path
+            and len(content) < FAST_PATH_MAX_LENGTH
+            and _FAST_PATH_PATTERN.search(content) is None
+        )
+    
+    def _cached_safe_result(self, content: str):
+        """Return a fresh copy of the cached non-toxic result for content, or None"""
+        if self.safe_cache_size <= 0:
+            return None
+        with self._safe_cache_lock:
+            result = self._safe_cache.get(content)
+            if result is None:
+                return None
+            self._safe_cache.move_to_end(content)
+        return {**result, 'categories': list(result['categories']), 'timestamp': _utc_timestamp()}
+    
+    def _remember_safe_result(self, content: str, result: Dict):
+        """Cache a non-toxic model result, evicting the least recently used entry when full"""
+        # Rule-based fallback results (model errors) are not cached
+        if self.safe_cache_size <= 0 or result['is_toxic'] or result.get('model_used') == 'rule-based-patterns':
+            return
+        with self._safe_cache_lock:
+            self._safe_cache[content] = {**result, 'categories': list(result['categories'])}
+            self._safe_cache.move_to_end(content)
+            if len(self._safe_cache) > self.safe_cache_size:
+                self._safe_cache.popitem(last=False)
+    
     def _check_toxicity_ml(self, content: str) -> Dict:
         """Check toxicity using ML model"""
         try:
             # Clean content for better model performance
             clean_content = self._clean_content_for_ml(content)
 
-            # Direct model inference
-            inputs = self.tokenizer(
-                clean_content,
-                return_tensors='pt',
-                truncation=True,
-                padding='max_length',
-                max_length=getattr(self, 'max_length', 512)
-            )
-            inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
-            with torch.no_grad():
-                logits = self.model(**inputs).logits
             # Single logit; apply sigmoid
-            toxicity_score = float(expit(logits.squeeze().cpu().item()))
+            toxicity_score = _sigmoid(self._raw_logit_cached(clean_content))
 
-            # Ensure score is within valid range [0, 1]
-            toxicity_score = max(0.0, min(1.0, toxicity_score))
+            return self._build_ml_result(content, clean_content, toxicity_score)
+        except Exception as e:
+            logger.error(f"ML toxicity detection failed: {str(e)}")
+            logger.info("Falling back to rule-based detection for this request")
+            return self._check_toxicity_rule_based(content)
+    
+    def get_raw_model_output(self, content: str) -> Dict:
+        """
+        Get the model's raw output for content (ML model only)
+        
+        Args:
+            content (str): The text content to analyze
+            
+        Returns:
+            Dict: Cleaned content, raw logit and sigmoid score; memoized together with check_toxicity
+        """
+        if not self.use_ml_model:
+            raise ValueError("Raw model output requires the ML model")
+        clean_content = self._clean_content_for_ml(content)
+        raw_logit = self._raw_logit_cached(clean_content)
+        return {
+            'clean_content': clean_content,
+            'raw_logit': raw_logit,
+            'toxicity_score': _sigmoid(raw_logit)
+        }
+    
+    def warm_up(self, batch_size: int = 8):
+        """Run throwaway single and batched forward passes so the first requests don't pay one-time model costs"""
+        if not self.use_ml_model:
+            return
+        # Distinct texts of different lengths: they bypass the fast path and result caches,
+        # and the batch is not deduplicated down to one row
+        texts = [" ".join(["warm-up"] * (i + 1)) for i in range(batch_size)]
+        self._raw_logit(texts[0])
+        self._check_toxicity_ml_batch(texts, batch_size)
+    
+    def _raw_logit(self, clean_content: str) -> float:
+        """Run the model on one cleaned content and return its raw logit"""
+        # Direct model inference on cached tokenized inputs
+        inputs = dict(self._tokenize_cached(clean_content))
+        return float(self._model_logits(inputs)[0])
+    
+    def _tokenize(self, clean_content: str) -> Tuple:
+        """Tokenize a single content; returned as a tuple of (name, tensor) pairs so it can be cached"""
+        # A single sequence needs no padding
+        inputs = self.tokenizer(
+            clean_content,
+            return_tensors='pt',
+            truncation=True,
+            padding=False,
+            max_length=getattr(self, 'max_length', 512)
+        )
+        return tuple(inputs.items())
+    
+    def _check_toxicity_ml_batch(self, contents: List[str], batch_size: int = ML_BATCH_SIZE) -> List[Dict]:
+        """Check toxicity for several contents with one forward pass per length-sorted mini-batch"""
+        try:
+            clean_contents = [self._clean_content_for_ml(content) for content in contents]
+            # Repeated content reuses the same tokenization cache as single checks
+            rows = [dict(self._tokenize_cached(clean_content)) for clean_content in clean_contents]
+            pad_token_id = self.tokenizer.pad_token_id or 0
 
-            # Use threshold from config or default
-            toxicity_threshold = getattr(self, 'optimal_threshold', 0.5)
-            logger.debug(f"Using toxicity threshold: {toxicity_threshold}")
+            # Group similar token lengths together so each mini-batch needs little padding
+            order = np.argsort([row['input_ids'].shape[1] for row in rows], kind='stable')
+            toxicity_scores = np.empty(len(contents), dtype=np.float64)
 
-            # Final toxicity decision based on threshold
-            is_toxic = toxicity_score >= toxicity_threshold
+            for start in range(0, len(order), batch_size):
+                batch_idx = order[start:start + batch_size]
+                # Pad only to the longest sequence in the mini-batch
+                inputs = {
+                    name: torch.nn.utils.rnn.pad_sequence(
+                        [rows[i][name][0] for i in batch_idx],
+                        batch_first=True,
+                        padding_value=pad_token_id if name == 'input_ids' else 0
+                    )
+                    for name in rows[batch_idx[0]]
+                }
+                # One logit per row; apply sigmoid to the whole mini-batch at once
+                toxicity_scores[batch_idx] = expit(self._model_logits(inputs))
 
-            # Calculate confidence based on distance from threshold
-            threshold_distance = abs(toxicity_score - toxicity_threshold)
-            confidence = min(1.0, max(threshold_distance * 2, 0.0))
+            return [
+                self._build_ml_result(content, clean_content, float(toxicity_score))
+                for content, clean_content, toxicity_score in zip(contents, clean_contents, toxicity_scores)
+            ]
+        except Exception as e:
+            logger.error(f"ML batch toxicity detection failed: {str(e)}")
+            logger.info("Falling back to rule-based detection for this batch")
+            return [self._check_toxicity_rule_based(content) for content in contents]
+    
+    def _model_logits(self, inputs: Dict) -> np.ndarray:
+        """Run the model on tokenized inputs and return one logit per row"""
+        if self.ort_session is not None:
+            ort_inputs = {name: inputs[name].numpy() for name in self.ort_input_names}
+            logits = self.ort_session.run(["logits"], ort_inputs)[0]
+            return logits.squeeze(-1)
+        
+        if self.compile_pad_multiple:
+            inputs = self._pad_to_multiple(inputs, self.compile_pad_multiple)
+        
+        device = self.model.device
+        if device.type == "cpu":
+            # CPU tensors (often straight from the tokenization cache) are used without a copy
+            with torch.inference_mode():
+                logits = self.model(**inputs).logits
+        elif inputs['input_ids'].shape[0] == 1:
+            # Single rows are copied into preallocated device buffers instead of fresh allocations
+            with self._input_buffer_lock, torch.inference_mode():
+                logits = self.model(**self._fill_input_buffers(inputs)).logits
+        else:
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+            with torch.inference_mode():
+                logits = self.model(**inputs).logits
+        # Upcast so half-precision logits convert to NumPy
+        return logits.squeeze(-1).float().cpu().numpy()
+    
+    def _pad_to_multiple(self, inputs: Dict, multiple: int) -> Dict:
+        """Right-pad tokenized inputs to the next multiple of the given length (capped at max_length)"""
+        seq_len = inputs['input_ids'].shape[1]
+        padded_len = min(-(-seq_len // multiple) * multiple, max(seq_len, getattr(self, 'max_length', 512)))
+        if padded_len == seq_len:
+            return inputs
+        pad_token_id = self.tokenizer.pad_token_id or 0
+        return {
+            name: torch.nn.functional.pad(
+                tensor,
+                (0, padded_len - seq_len),
+                value=pad_token_id if name == 'input_ids' else 0
+            )
+            for name, tensor in inputs.items()
+        }
+    
+    def _fill_input_buffers(self, inputs: Dict) -> Dict:
+        """Copy one tokenized row into the reusable device buffers (caller holds the buffer lock)"""
+        staged = {}
+        for name, tensor in inputs.items():
+            buffer = self._input_buffers.get(name)
+            if buffer is None:
+                buffer = torch.zeros(
+                    (1, getattr(self, 'max_length', 512)),
+                    dtype=tensor.dtype,
+                    device=self.model.device
+                )
+                self._input_buffers[name] = buffer
+            seq_len = tensor.shape[1]
+            buffer[:, :seq_len].copy_(tensor)
+            # Slice to the real length so the model sees no extra padding
+            staged[name] = buffer[:, :seq_len]
+        return staged
+    
+    def _build_ml_result(self, content: str, clean_content: str, toxicity_score: float) -> Dict:
+        """Turn a raw model score into the service's result format"""
+        # Ensure score is within valid range [0, 1]
+        toxicity_score = max(0.0, min(1.0, toxicity_score))
 
-            # Combine extremes confidence
-            confidence = max(confidence, 1.0 - abs(0.5 - toxicity_score) * 2)
+        # Use threshold from config or default
+        toxicity_threshold = getattr(self, 'optimal_threshold', 0.5)
+        logger.debug(f"Using toxicity threshold: {toxicity_threshold}")
 
-            # Ensure minimum confidence
-            if toxicity_score <= 0.1 or toxicity_score >= 0.9:
-                confidence = max(confidence, 0.85)
-            confidence = min(1.0, confidence)
+        # Final toxicity decision based on threshold
+        is_toxic = toxicity_score >= toxicity_threshold
 
-            # Determine categories heuristically
-            categories = self._analyze_toxicity_categories_ml(clean_content, toxicity_score)
+        # Calculate confidence based on distance from threshold
+        threshold_distance = abs(toxicity_score - toxicity_threshold)
+        confidence = min(1.0, max(threshold_distance * 2, 0.0))
 
-            return {
-                'is_toxic': is_toxic,
-                'toxicity_score': round(toxicity_score, 3),
-                'confidence': round(confidence, 3),
-                'categories': categories,
-                'content_length': len(content),
-                'timestamp': datetime.utcnow().isoformat(),
-                'detector_version': '2.0.5-ml-fast',
-                'model_used': getattr(self, 'model_name_loaded', 'toxicity-model-fast'),
-                'threshold_used': toxicity_threshold,
-                'raw_score': round(toxicity_score, 4)
-            }
-        except Exception as e:
-            logger.error(f"ML toxicity detection failed: {str(e)}")
-            logger.info("Falling back to rule-based detection for this request")
-            return self._check_toxicity_rule_based(content)
+        # Combine extremes confidence
+        confidence = max(confidence, 1.0 - abs(0.5 - toxicity_score) * 2)
+
+        # Ensure minimum confidence
+        if toxicity_score <= 0.1 or toxicity_score >= 0.9:
+            confidence = max(confidence, 0.85)
+        confidence = min(1.0, confidence)
+
+        # Determine categories heuristically
+        categories = self._analyze_toxicity_categories_ml(clean_content, toxicity_score)
+
+        return {
+            'is_toxic': is_toxic,
+            'toxicity_score': round(toxicity_score, 3),
+            'confidence': round(confidence, 3),
+            'categories': categories,
+            'content_length': len(content),
+            'timestamp': _utc_timestamp(),
+            'detector_version': '2.0.5-ml-fast',
+            'model_used': getattr(self, 'model_name_loaded', 'toxicity-model-fast'),
+            'threshold_used': toxicity_threshold,
+            'raw_score': round(toxicity_score, 4)
+        }
     
     def _check_toxicity_rule_based(self, content: str) -> Dict:
         """Check toxicity using rule-based approach (fallback)"""
@@ -252,18 +742,31 @@ class ToxicityDetector:
             'confidence': round(confidence, 3),
             'categories': categories,
             'content_length': len(content),
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': _utc_timestamp(),
             'detector_version': '1.0.0-rule-based',
             'model_used': 'rule-based-patterns'
         }
     
-    def _clean_content_for_ml(self, content: str) -> str:
+    @staticmethod
+    def _clean_content_for_ml(content: str) -> str:
         """Clean content for ML model processing"""
+        # Already-clean ASCII (the common case) passes through unchanged; strip(chars) is empty
+        # only when every character is in the safe set
+        if (
+            len(content) <= 512
+            and content.isascii()
+            and not content.strip(_ML_SAFE_ASCII)
+            and '  ' not in content
+            and content[:1] != ' '
+            and content[-1:] != ' '
+        ):
+            return content
+        
         # Remove excessive whitespace
-        clean = re.sub(r'\s+', ' ', content).strip()
+        clean = _WHITESPACE_RE.sub(' ', content).strip()
         
         # Remove or replace some special characters that might confuse the model
-        clean = re.sub(r'[^\w\s\.\!\?\,\;\:\-\'\"]', ' ', clean)
+        clean = _ML_SPECIAL_CHARS_RE.sub(' ', clean)
         
         # Truncate if too long (BERT models have token limits)
         if len(clean) > 512:
@@ -278,31 +781,15 @@ class ToxicityDetector:
         
         # Use keyword-based categorization as supplement to ML model
         if toxicity_score > 0.3:
-            # Check for profanity
-            profanity_keywords = ['fuck', 'shit', 'damn', 'bitch', 'asshole']
-            if any(word in content_lower for word in profanity_keywords):
-                categories.append('profanity')
-            
-            # Check for hate speech
-            hate_keywords = ['hate', 'kill', 'die', 'murder']
-            if any(word in content_lower for word in hate_keywords):
-                categories.append('hate_speech')
-            
-            # Check for harassment
-            harassment_keywords = ['stupid', 'idiot', 'moron', 'loser', 'pathetic']
-            if any(word in content_lower for word in harassment_keywords):
-                categories.append('harassment')
-            
-            # Check for threats
-            threat_keywords = ['kill you', 'hurt you', 'destroy you', 'eliminate']
-            if any(phrase in content_lower for phrase in threat_keywords):
-                categories.append('threat')
+            found = set()
+            for match in _CATEGORY_KEYWORD_PATTERN.finditer(content_lower):
+                found |= _KEYWORD_CATEGORIES[match.group(1)]
+            categories = [category for category in ML_CATEGORY_KEYWORDS if category in found]
             
             # If no specific category found but score is high, mark as general toxicity
             if not categories and toxicity_score > 0.6:
                 categories.append('general_toxicity')
         
-        
         return categories
     
     def _clean_content(self, content: str) -> str:
@@ -311,17 +798,13 @@ class ToxicityDetector:
         clean = content.lower()
         
         # Remove extra whitespace
-        clean = re.sub(r'\s+', ' ', clean).strip()
+        clean = _WHITESPACE_RE.sub(' ', clean).strip()
         
-        # Handle common obfuscation techniques
-        clean = re.sub(r'[4@]', 'a', clean)
-        clean = re.sub(r'[3]', 'e', clean)
-        clean = re.sub(r'[1!]', 'i', clean)
-        clean = re.sub(r'[0]', 'o', clean)
-        clean = re.sub(r'[5$]', 's', clean)
+        # Handle common obfuscation techniques in a single pass
+        clean = clean.translate(_LEET_TABLE)
         
         # Remove non-alphanumeric except spaces
-        clean = re.sub(r'[^a-z0-9\s]', '', clean)
+        clean = _NON_ALNUM_RE.sub('', clean)
         
         return clean
     
@@ -329,6 +812,11 @@ class ToxicityDetector:
         """Find all toxic patterns in content"""
         matches = []
         
+        # Most content is clean; skip the per-pattern scans when nothing can match
+        if self.combined_pattern.search(content) is None:
+            return matches
+        
+        # Patterns can overlap, so count each one's matches separately
         for i, pattern in enumerate(self.compiled_patterns):
             pattern_matches = pattern.findall(content)
             for match in pattern_matches:
@@ -341,37 +829,36 @@ class ToxicityDetector:
         if not matches:
             return 0.0, []
         
-        category_scores = {}
-        identified_categories = set()
-        
-        # Calculate scores for each category
-        for match, pattern_index in matches:
-            for category, pattern_indices in self.toxicity_categories.items():
-                if pattern_index in pattern_indices:
-                    if category not in category_scores:
-                        category_scores[category] = 0
-                    category_scores[category] += self.severity_weights[category]
-                    identified_categories.add(category)
+        # Count matches per pattern, then per category; each match adds its category's weight
+        pattern_counts = np.bincount([pattern_index for _, pattern_index in matches], minlength=len(self.toxic_patterns))
+        category_counts = pattern_counts @ self._pattern_category_matrix
+        identified = category_counts > 0
+        if not identified.any():
+            return 0.0, []
         
         # Calculate overall score (average of category scores, capped at 1.0)
-        if category_scores:
-            total_score = sum(category_scores.values()) / len(category_scores)
-            final_score = min(1.0, total_score)
-        else:
-            final_score = 0.0
+        category_scores = category_counts[identified] * self._category_weights[identified]
+        final_score = min(1.0, float(category_scores.mean()))
         
-        return final_score, sorted(list(identified_categories))
+        return final_score, [self._score_categories[j] for j in np.flatnonzero(identified)]
     
     def get_detector_info(self) -> Dict:
         """Get information about the detector"""
         if self.use_ml_model:
-            return {
+            info = {
                 'detector_type': 'ml_model',
                 'version': '2.0.5',
                 'model_name': 'toxicity-model-fast',
                 'framework': 'transformers',
+                'runtime': 'onnxruntime-int8' if getattr(self, 'ort_session', None) is not None else 'pytorch',
+                'quantized': getattr(self, 'quantized', False),
                 'description': 'ML-based toxicity detector using custom-trained DistilBERT regression model'
             }
+            if info['runtime'] == 'pytorch':
+                # Every forward pass runs under torch.inference_mode() on an eval-mode model
+                info['eval_mode'] = not self.model.training
+                info['inference_mode'] = True
+            return info
         else:
             return {
                 'detector_type': 'rule_based',
@@ -1,5 +1,7 @@
 # Utility functions and helpers for the moderation service
 
 from .validators import validate_content, validate_yeet_id, validate_user_id, sanitize_input
+from .json_provider import ORJSONProvider, ORJSON_AVAILABLE
 
-__all__ = ['validate_content', 'validate_yeet_id', 'validate_user_id', 'sanitize_input']
\ No newline at end of file
+__all__ = ['validate_content', 'validate_yeet_id', 'validate_user_id', 'sanitize_input',
+           'ORJSONProvider', 'ORJSON_AVAILABLE']
\ No newline at end of file
@@ -0,0 +1,33 @@
+from typing import Any, Union
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+class ORJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson
+    
+    Used transparently by jsonify() and request.get_json(). Types orjson
+    can't handle natively fall back to Flask's default serializer.
+    """
+    
+    def _options(self, indent: bool, sort_keys: bool) -> int:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        # Keep Flask's sorted-key output (DefaultJSONProvider.sort_keys)
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = self._options(kwargs.get('indent'), kwargs.get('sort_keys', self.sort_keys))
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+    
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
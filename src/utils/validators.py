@@ -1,6 +1,15 @@
 import re
+import string
 from typing import Dict, Any
 
+# Patterns compiled once at import time
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+# Same control characters as a translate table (fast on ASCII text only)
+_CONTROL_CHARS_TABLE = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+
+# Characters allowed in yeet and user IDs
+_ID_CHARS = frozenset(string.ascii_letters + string.digits + '-_')
+
 def validate_content(content: Any) -> Dict[str, Any]:
     """
     Validate content for toxicity checking
@@ -54,7 +63,10 @@ def sanitize_input(text: str) -> str:
         return ""
     
     # Remove null bytes and control characters except newlines and tabs
-    sanitized = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
+    if text.isascii():
+        sanitized = text.translate(_CONTROL_CHARS_TABLE)
+    else:
+        sanitized = _CONTROL_CHARS_RE.sub('', text)
     
     # Limit length
     sanitized = sanitized[:10000]
@@ -78,7 +90,7 @@ def validate_yeet_id(yeet_id: Any) -> bool:
         return False
     
     # Simple validation - alphanumeric and hyphens, reasonable length
-    return bool(re.match(r'^[a-zA-Z0-9\-_]{1,50}$', yeet_id))
+    return 1 <= len(yeet_id) <= 50 and _ID_CHARS.issuperset(yeet_id)
 
 def validate_user_id(user_id: Any) -> bool:
     """
@@ -97,4 +109,4 @@ def validate_user_id(user_id: Any) -> bool:
         return False
     
     # Simple validation - alphanumeric and hyphens, reasonable length
-    return bool(re.match(r'^[a-zA-Z0-9\-_]{1,50}$', user_id))
+    return 1 <= len(user_id) <= 50 and _ID_CHARS.issuperset(user_id)
@@ -70,5 +70,5 @@ if ($env:FLASK_ENV -eq "development") {
 }
 else {
     Write-Host "🏭 Running in production mode..." -ForegroundColor Cyan
-    gunicorn --bind "0.0.0.0:$port" --workers 2 --timeout 120 src.app:app
+    gunicorn -c gunicorn_conf.py app:app
 }
@@ -46,5 +46,5 @@ export FLASK_ENV=${FLASK_ENV:-production}
 if [ "${FLASK_ENV}" = "development" ]; then
     flask run --host=0.0.0.0 --port=${PORT:-5000}
 else
-    gunicorn --bind 0.0.0.0:${PORT:-5000} --workers 2 --timeout 120 src.app:app
+    gunicorn -c gunicorn_conf.py app:app
 fi
@@ -6,16 +6,22 @@ Test script to verify the custom toxicity model is working correctly
 import os
 import sys
 import logging
+from functools import lru_cache
 
 # Add src directory to path so we can import our modules
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from services.toxicity_detector import ToxicityDetector
-
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=2)
+def _get_detector(use_ml_model: bool):
+    """Build each detector configuration once per process (ML model loading is slow)"""
+    # Imported here so torch/transformers only load once a detector is actually needed
+    from services.toxicity_detector import ToxicityDetector
+    return ToxicityDetector(use_ml_model=use_ml_model)
+
 def test_custom_model():
     """Test the custom toxicity model"""
     
@@ -31,7 +37,7 @@ def test_custom_model():
     try:
         # Initialize the detector
         print("\n1. Initializing ToxicityDetector...")
-        detector = ToxicityDetector(use_ml_model=True)
+        detector = _get_detector(True)
         
         print(f"   ✓ Model type: {'ML-based' if detector.use_ml_model else 'Rule-based'}")
         
@@ -85,7 +91,7 @@ def test_fallback():
     
     try:
         # Initialize with ML disabled to force rule-based
-        detector = ToxicityDetector(use_ml_model=False)
+        detector = _get_detector(False)
         
         print(f"   ✓ Model type: {'ML-based' if detector.use_ml_model else 'Rule-based'}")
         
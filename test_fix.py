@@ -2,8 +2,11 @@
 """
 Quick test to validate the toxicity calculation fix
 """
-import requests
-import json
+
+from harness import dumps, loads, make_session, run_cases
+
+# Shared keep-alive session so requests reuse pooled connections
+SESSION = make_session()
 
 def test_toxicity_fix():
     """Test if the toxicity calculations are now correct"""
@@ -40,23 +43,25 @@ def test_toxicity_fix():
     print("🧪 Testing Toxicity Calculation Fix")
     print("=" * 50)
     
-    for i, test in enumerate(test_cases, 1):
+    # Encode all request bodies up front
+    bodies = [
+        dumps({
+            "content": test["content"],
+            "yeet_id": f"test_{i}",
+            "user_id": "test_user"
+        })
+        for i, test in enumerate(test_cases, 1)
+    ]
+    
+    # Send all checks concurrently, then report them in order
+    pending = run_cases(SESSION, f"{base_url}/api/moderation/check", bodies, timeout=10)
+    
+    for i, (test, future) in enumerate(zip(test_cases, pending), 1):
         try:
-            payload = {
-                "content": test["content"],
-                "yeet_id": f"test_{i}",
-                "user_id": "test_user"
-            }
-            
-            response = requests.post(
-                f"{base_url}/api/moderation/check",
-                json=payload,
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
+            response, _ = future.result()
             
             if response.status_code == 200:
-                data = response.json()
+                data = loads(response.content)
                 is_toxic = data['is_toxic']
                 score = data['toxicity_score']
                 
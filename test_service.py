@@ -4,22 +4,29 @@ Test script for the Moderation Service
 Tests both ML-based and rule-based toxicity detection
 """
 
-import requests
-import json
+import argparse
+import sys
 import time
-from typing import Dict, List
+from concurrent.futures import Future
+from itertools import count
+from typing import Optional
+
+from harness import dumps, loads, make_session, preview, run_cases, timed_post
 
 # Service configuration
 BASE_URL = "http://localhost:5000"
 API_BASE = f"{BASE_URL}/api/moderation"
 
+# Shared keep-alive session so sequential requests reuse pooled connections
+SESSION = make_session()
+
 def test_health_check():
     """Test the health check endpoint"""
     print("🏥 Testing health check...")
     try:
-        response = requests.get(f"{BASE_URL}/health", timeout=5)
+        response = SESSION.get(f"{BASE_URL}/health", timeout=5)
         if response.status_code == 200:
-            data = response.json()
+            data = loads(response.content)
             print(f"✅ Health check passed: {data['status']}")
             print(f"📊 Detector info: {data.get('detector', {})}")
             return True
@@ -30,27 +37,32 @@ def test_health_check():
         print(f"❌ Health check error: {e}")
         return False
 
-def test_single_content(content: str, expected_toxic: bool = None, description: str = ""):
-    """Test single content toxicity check"""
+# Sequential yeet IDs for test requests
+_yeet_ids = count(1)
+
+def _check_body(content: str) -> bytes:
+    """Encode a single content check request"""
+    return dumps({
+        "content": content,
+        "yeet_id": f"test_{next(_yeet_ids)}",
+        "user_id": "test_user"
+    })
+
+def test_single_content(content: str, expected_toxic: bool = None, description: str = "",
+                        pending: Optional[Future] = None):
+    """Test single content toxicity check (pending: an already-sent harness.run_cases request)"""
     print(f"\n🔍 Testing: {description}")
     print(f"Content: '{content[:50]}{'...' if len(content) > 50 else ''}'")
     
     try:
-        payload = {
-            "content": content,
-            "yeet_id": f"test_{int(time.time())}",
-            "user_id": "test_user"
-        }
-        
-        response = requests.post(
-            f"{API_BASE}/check", 
-            json=payload,
-            headers={'Content-Type': 'application/json'},
-            timeout=10
-        )
+        if pending is None:
+            pending_result = timed_post(SESSION, f"{API_BASE}/check", _check_body(content), timeout=10)
+        else:
+            pending_result = pending.result()
+        response, _ = pending_result
         
         if response.status_code == 200:
-            data = response.json()
+            data = loads(response.content)
             is_toxic = data['is_toxic']
             score = data['toxicity_score']
             confidence = data['confidence']
@@ -72,7 +84,7 @@ def test_single_content(content: str, expected_toxic: bool = None, description:
             return True
         else:
             print(f"❌ Request failed: {response.status_code}")
-            print(f"Error: {response.text}")
+            print(f"Error: {preview(response)}")
             return False
             
     except Exception as e:
@@ -104,27 +116,30 @@ def test_batch_content():
     try:
         payload = {"yeets": test_contents}
         
-        response = requests.post(
+        response = SESSION.post(
             f"{API_BASE}/batch",
             json=payload,
-            headers={'Content-Type': 'application/json'},
             timeout=15
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = loads(response.content)
             results = data['results']
             total = data['total_processed']
             
             print(f"✅ Batch processed: {total} items")
             
+            # Build all item lines, then write them in one call
+            lines = []
             for i, result in enumerate(results):
                 if 'error' in result:
-                    print(f"  {i+1}. ❌ Error: {result['error']}")
+                    lines.append(f"  {i+1}. ❌ Error: {result['error']}")
                 else:
                     is_toxic = result['is_toxic']
                     score = result['toxicity_score']
-                    print(f"  {i+1}. {'🔴 TOXIC' if is_toxic else '🟢 SAFE'} (score: {score:.3f})")
+                    lines.append(f"  {i+1}. {'🔴 TOXIC' if is_toxic else '🟢 SAFE'} (score: {score:.3f})")
+            if lines:
+                sys.stdout.write("\n".join(lines) + "\n")
             
             return True
         else:
@@ -150,10 +165,9 @@ def test_error_cases():
     
     for payload, description in test_cases:
         try:
-            response = requests.post(
+            response = SESSION.post(
                 f"{API_BASE}/check",
                 json=payload,
-                headers={'Content-Type': 'application/json'},
                 timeout=5
             )
             
@@ -165,8 +179,8 @@ def test_error_cases():
         except Exception as e:
             print(f"❌ {description}: Error {e}")
 
-def run_comprehensive_tests():
-    """Run a comprehensive test suite"""
+def run_comprehensive_tests(rate_limit: Optional[float] = None):
+    """Run a comprehensive test suite (rate_limit: seconds to wait between single checks)"""
     print("🚀 Starting Moderation Service Test Suite")
     print("=" * 50)
     
@@ -192,10 +206,19 @@ def run_comprehensive_tests():
     success_count = 0
     total_tests = len(test_cases)
     
-    for content, expected_toxic, description in test_cases:
-        if test_single_content(content, expected_toxic, description):
-            success_count += 1
-        time.sleep(0.5)  # Small delay between tests
+    if rate_limit:
+        # Paced sequential checks for rate-limited servers
+        for content, expected_toxic, description in test_cases:
+            if test_single_content(content, expected_toxic, description):
+                success_count += 1
+            time.sleep(rate_limit)
+    else:
+        # Send all checks concurrently, then report them in order
+        bodies = [_check_body(content) for content, _, _ in test_cases]
+        pending = run_cases(SESSION, f"{API_BASE}/check", bodies, timeout=10)
+        for (content, expected_toxic, description), future in zip(test_cases, pending):
+            if test_single_content(content, expected_toxic, description, pending=future):
+                success_count += 1
     
     # Test batch functionality
     if test_batch_content():
@@ -219,9 +242,9 @@ def test_detector_info():
     """Test the detector info endpoint"""
     print("\n🔧 Testing detector info endpoint...")
     try:
-        response = requests.get(f"{API_BASE}/info", timeout=5)
+        response = SESSION.get(f"{API_BASE}/info", timeout=5)
         if response.status_code == 200:
-            data = response.json()
+            data = loads(response.content)
             print(f"✅ Detector info retrieved:")
             print(f"   Type: {data.get('detector_type')}")
             print(f"   Version: {data.get('version')}")
@@ -237,11 +260,16 @@ def test_detector_info():
         return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Moderation Service test suite")
+    parser.add_argument("--rate-limit", type=float, default=None, metavar="SECONDS",
+                        help="Send single checks sequentially with this delay (for rate-limited servers)")
+    args = parser.parse_args()
+    
     # Test detector info
     test_detector_info()
     
     # Run comprehensive tests
-    run_comprehensive_tests()
+    run_comprehensive_tests(rate_limit=args.rate_limit)
     
     print(f"\n🏁 Test suite completed!")
     print(f"💡 Tip: Check the service logs for detailed ML model information")
@@ -9,9 +9,17 @@ to isolate whether the issue is in the service integration or model logic.
 
 import os
 import sys
-import json
+from collections import Counter
 from datetime import datetime
 
+import numpy as np
+
+from fixtures import TEST_CASES
+from harness import dumps
+
+# QUIET=1 skips the per-case report (summary and diagnosis are still printed)
+QUIET = os.getenv("QUIET") == "1"
+
 # Add the service source path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
@@ -29,29 +37,10 @@ class ServiceLogicTester:
         print("🔧 Initializing Service Logic Tester...")
         
         # Test messages with different severity levels
-        self.test_messages = [
-            # Clean content
-            {"content": "I love this beautiful day!", "expected_toxic": False, "severity": "✅ Clean"},
-            {"content": "Thank you for your helpful feedback.", "expected_toxic": False, "severity": "✅ Clean"},
-            {"content": "This is a great article about technology.", "expected_toxic": False, "severity": "✅ Clean"},
-            {"content": "What a wonderful community we have here.", "expected_toxic": False, "severity": "✅ Clean"},
-            {"content": "The weather forecast shows rain tomorrow.", "expected_toxic": False, "severity": "✅ Clean"},
-            
-            # Borderline content
-            {"content": "I disagree with this opinion.", "expected_toxic": False, "severity": "😐 Neutral"},
-            {"content": "This is quite frustrating to deal with.", "expected_toxic": False, "severity": "😐 Neutral"},
-            {"content": "You're being annoying.", "expected_toxic": True, "severity": "⚠️ Mild"},
-            {"content": "That's a stupid idea.", "expected_toxic": True, "severity": "⚠️ Mild"},
-            {"content": "This is dumb.", "expected_toxic": True, "severity": "⚠️ Mild"},
-            
-            # Clearly toxic content
-            {"content": "You're a complete idiot.", "expected_toxic": True, "severity": "🚨 Toxic"},
-            {"content": "Go kill yourself.", "expected_toxic": True, "severity": "🚨 Toxic"},
-            {"content": "I hate you so much.", "expected_toxic": True, "severity": "🚨 Toxic"},
-            {"content": "You're worthless and should die.", "expected_toxic": True, "severity": "🚨 Toxic"},
-            {"content": "F**k you, you piece of sh*t.", "expected_toxic": True, "severity": "🚨 Toxic"},
-            {"content": "Nobody likes you, loser.", "expected_toxic": True, "severity": "🚨 Toxic"},
-        ]
+        self.test_messages = TEST_CASES
+        
+        # Full detector results are only kept in the records with TOX_DEBUG=1
+        self.debug = os.getenv("TOX_DEBUG") == "1"
         
         # Initialize the detector (same as service)
         self.detector = ToxicityDetector(use_ml_model=True)
@@ -61,67 +50,100 @@ class ServiceLogicTester:
         print("🧪 Testing Service Logic...")
         print("=" * 80)
         
-        results = []
-        correct_predictions = 0
-        
-        for i, test_case in enumerate(self.test_messages, 1):
-            content = test_case["content"]
-            expected = test_case["expected_toxic"]
-            severity = test_case["severity"]
-            
-            print(f"\n📝 Test {i}/{len(self.test_messages)}: {severity}")
-            print(f"💬 Content: \"{content}\"")
-            print(f"🎯 Expected: {'TOXIC' if expected else 'CLEAN'}")
-            
-            try:
-                # Call the exact same method our service uses
-                result = self.detector.check_toxicity(content)
-                
-                # Extract key information
-                is_toxic = result.get('is_toxic', False)
-                toxicity_score = result.get('toxicity_score', 0.0)
-                confidence = result.get('confidence', 0.0)
-                categories = result.get('categories', [])
-                detector_version = result.get('detector_version', 'unknown')
-                model_used = result.get('model_used', 'unknown')
-                threshold_used = result.get('threshold_used', 0.5)
+        results = [None] * len(self.test_messages)
+        # Parallel per-case arrays for the vectorized summary; errored cases stay unscored
+        correct = np.zeros(len(self.test_messages), dtype=np.bool_)
+        scored = np.zeros(len(self.test_messages), dtype=np.bool_)
+        scores = np.zeros(len(self.test_messages), dtype=np.float64)
+        # Misclassified records, collected as each case is classified
+        false_positives, false_negatives = [], []
+        
+        # Results are streamed as JSON lines; the summary goes to a sidecar file at the end.
+        # One timestamp names both files and is stored as a plain string.
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        results_file = f"service_logic_test_{timestamp}.jsonl"
+        
+        with open(results_file, 'wb') as results_out:
+            for i, test_case in enumerate(self.test_messages, 1):
+                content = test_case.text
+                expected = test_case.expected_toxic
+                severity = test_case.severity
                 
-                # Check if prediction is correct
-                is_correct = (is_toxic == expected)
-                if is_correct:
-                    correct_predictions += 1
-                    status_icon = "✅"
-                else:
-                    status_icon = "❌"
+                # Each case's report is written in one go (or skipped entirely with QUIET=1)
+                lines = [
+                    f"\n📝 Test {i}/{len(self.test_messages)}: {severity}",
+                    f"💬 Content: \"{content}\"",
+                    f"🎯 Expected: {'TOXIC' if expected else 'CLEAN'}",
+                ]
                 
-                print(f"📊 Result: {'TOXIC' if is_toxic else 'CLEAN'} {status_icon}")
-                print(f"📈 Toxicity Score: {toxicity_score:.4f}")
-                print(f"🎲 Confidence: {confidence:.4f}")
-                print(f"🔧 Threshold: {threshold_used}")
-                print(f"🏷️  Categories: {categories}")
-                print(f"🤖 Model: {model_used}")
-                print(f"📦 Detector: {detector_version}")
+                try:
+                    # Call the exact same method our service uses
+                    result = self.detector.check_toxicity(content)
+                    
+                    # Extract key information
+                    is_toxic = result.get('is_toxic', False)
+                    toxicity_score = result.get('toxicity_score', 0.0)
+                    confidence = result.get('confidence', 0.0)
+                    categories = result.get('categories', [])
+                    detector_version = result.get('detector_version', 'unknown')
+                    model_used = result.get('model_used', 'unknown')
+                    threshold_used = result.get('threshold_used', 0.5)
+                    
+                    # Check if prediction is correct
+                    is_correct = (is_toxic == expected)
+                    status_icon = "✅" if is_correct else "❌"
+                    correct[i - 1] = is_correct
+                    scores[i - 1] = toxicity_score
+                    scored[i - 1] = True
+                    
+                    lines += (
+                        f"📊 Result: {'TOXIC' if is_toxic else 'CLEAN'} {status_icon}",
+                        f"📈 Toxicity Score: {toxicity_score:.4f}",
+                        f"🎲 Confidence: {confidence:.4f}",
+                        f"🔧 Threshold: {threshold_used}",
+                        f"🏷️  Categories: {categories}",
+                        f"🤖 Model: {model_used}",
+                        f"📦 Detector: {detector_version}",
+                    )
+                    
+                    # Store result
+                    record = {
+                        "content": content,
+                        "expected_toxic": expected,
+                        "severity": severity,
+                        "actual_toxic": is_toxic,
+                        "toxicity_score": toxicity_score,
+                        "confidence": confidence,
+                        "categories": categories,
+                        "is_correct": is_correct
+                    }
+                    if self.debug:
+                        record["full_result"] = result
+                    if is_toxic and not expected:
+                        false_positives.append(record)
+                    elif expected and not is_toxic:
+                        false_negatives.append(record)
+                    
+                except Exception as e:
+                    lines.append(f"❌ Error: {e}")
+                    record = {
+                        "content": content,
+                        "expected_toxic": expected,
+                        "severity": severity,
+                        "error": str(e),
+                        "is_correct": False
+                    }
+                results[i - 1] = record
                 
-                # Store result
-                results.append({
-                    **test_case,
-                    "actual_toxic": is_toxic,
-                    "toxicity_score": toxicity_score,
-                    "confidence": confidence,
-                    "categories": categories,
-                    "is_correct": is_correct,
-                    "full_result": result
-                })
+                # Errors are reported even when QUIET
+                if not QUIET or 'error' in record:
+                    sys.stdout.write('\n'.join(lines) + '\n')
                 
-            except Exception as e:
-                print(f"❌ Error: {e}")
-                results.append({
-                    **test_case,
-                    "error": str(e),
-                    "is_correct": False
-                })
+                # Stream each record as it completes instead of dumping everything at the end
+                results_out.write(dumps(record, strict=True) + b"\n")
         
         # Calculate accuracy
+        correct_predictions = int(correct.sum())
         accuracy = correct_predictions / len(self.test_messages)
         
         print("\n" + "=" * 80)
@@ -132,51 +154,40 @@ class ServiceLogicTester:
         
         # Breakdown by severity
         print("\n📋 Results by Severity:")
-        severity_stats = {}
-        for result in results:
-            sev = result['severity']
-            if sev not in severity_stats:
-                severity_stats[sev] = {"correct": 0, "total": 0}
-            severity_stats[sev]["total"] += 1
-            if result.get('is_correct', False):
-                severity_stats[sev]["correct"] += 1
-        
-        for sev, stats in severity_stats.items():
-            sev_acc = stats["correct"] / stats["total"] if stats["total"] > 0 else 0
-            print(f"  {sev}: {stats['correct']}/{stats['total']} ({sev_acc:.1%})")
+        totals = Counter(r['severity'] for r in results)
+        correct_by_sev = Counter(r['severity'] for r in results if r.get('is_correct'))
+        for sev, total in totals.items():
+            print(f"  {sev}: {correct_by_sev[sev]}/{total} ({correct_by_sev[sev] / total:.1%})")
         
         # Detailed analysis
         print("\n🔬 DETAILED ANALYSIS:")
         
         # Check false positives (clean content marked as toxic)
-        false_positives = [r for r in results if not r["expected_toxic"] and r.get("actual_toxic", False)]
         if false_positives:
             print(f"\n❌ False Positives ({len(false_positives)}):")
             for fp in false_positives:
-                print(f"   • \"{fp['content']}\" - Score: {fp.get('toxicity_score', 'N/A')}")
+                print(f"   • \"{fp['content']}\" - Score: {fp['toxicity_score']}")
         
         # Check false negatives (toxic content marked as clean)
-        false_negatives = [r for r in results if r["expected_toxic"] and not r.get("actual_toxic", True)]
         if false_negatives:
             print(f"\n❌ False Negatives ({len(false_negatives)}):")
             for fn in false_negatives:
-                print(f"   • \"{fn['content']}\" - Score: {fn.get('toxicity_score', 'N/A')}")
+                print(f"   • \"{fn['content']}\" - Score: {fn['toxicity_score']}")
         
         # Score distribution analysis
-        scores = [r.get('toxicity_score', 0) for r in results if 'toxicity_score' in r]
-        if scores:
+        scores = scores[scored]
+        if scores.size:
             print(f"\n📊 Score Distribution:")
-            print(f"   • Min: {min(scores):.4f}")
-            print(f"   • Max: {max(scores):.4f}")
-            print(f"   • Average: {sum(scores)/len(scores):.4f}")
-            print(f"   • Median: {sorted(scores)[len(scores)//2]:.4f}")
+            print(f"   • Min: {scores.min():.4f}")
+            print(f"   • Max: {scores.max():.4f}")
+            print(f"   • Average: {scores.mean():.4f}")
+            print(f"   • Median: {np.median(scores):.4f}")
         
-        # Save results
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        results_file = f"service_logic_test_{timestamp}.json"
+        # Save summary
+        summary_file = f"service_logic_test_{timestamp}.summary.json"
         
-        with open(results_file, 'w') as f:
-            json.dump({
+        with open(summary_file, 'wb') as f:
+            f.write(dumps({
                 "summary": {
                     "total_tests": len(self.test_messages),
                     "correct_predictions": correct_predictions,
@@ -184,19 +195,19 @@ class ServiceLogicTester:
                     "timestamp": timestamp,
                     "detector_info": self.detector.get_detector_info()
                 },
-                "results": results,
+                "results_file": results_file,
                 "analysis": {
                     "false_positives": len(false_positives),
                     "false_negatives": len(false_negatives),
                     "score_stats": {
-                        "min": min(scores) if scores else 0,
-                        "max": max(scores) if scores else 0,
-                        "avg": sum(scores)/len(scores) if scores else 0
+                        "min": float(scores.min()) if scores.size else 0,
+                        "max": float(scores.max()) if scores.size else 0,
+                        "avg": float(scores.mean()) if scores.size else 0
                     }
                 }
-            }, f, indent=2, default=str)
+            }, indent=True, strict=True))
         
-        print(f"\n💾 Results saved to: {results_file}")
+        print(f"\n💾 Results saved to: {results_file} (summary: {summary_file})")
         
         # Final diagnosis
         print("\n🏥 DIAGNOSIS:")
@@ -7,209 +7,320 @@ This script tests the toxicity detection model directly to determine if issues
 are with the model itself or our implementation.
 """
 
+import argparse
 import os
 import sys
-import json
-import torch
 import numpy as np
-from typing import Dict, List
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+from fixtures import MODEL_TEST_CASES
+from harness import dumps
+
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 try:
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-    from scipy.special import expit
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
     TRANSFORMERS_AVAILABLE = True
 except ImportError:
     print("❌ Transformers not available. Install with: pip install transformers torch")
     sys.exit(1)
 
+from services.toxicity_detector import half_precision_dtype
+
+try:
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+# Same intra-op thread count as the service; one inter-op thread since each forward is a single graph
+torch.set_num_threads(int(os.getenv("TORCH_NUM_THREADS", os.cpu_count())))
+torch.set_num_interop_threads(1)
+
+# QUIET=1 skips the per-case report (summary and diagnosis are still printed)
+QUIET = os.getenv("QUIET") == "1"
+
+# Upper token-length bounds of the inference buckets; longer texts share a final bucket
+LENGTH_BUCKETS = (16, 32, 64)
+
 class ToxicityModelTester:
     """Direct model testing class"""
     
     def __init__(self, model_path="./models/toxicity-model-final"):
         self.model_path = model_path
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # Raw logits and raw results are only printed/stored with TOX_DEBUG=1
+        self.debug = os.getenv("TOX_DEBUG") == "1"
         print(f"🔧 Using device: {self.device}")
         
         # Test data with expected results
-        self.test_cases = [
-            # Clean content (should be NON-TOXIC)
-            {"text": "I love this beautiful day!", "expected": "NON_TOXIC", "category": "✅ Positive"},
-            {"text": "Thank you for the helpful feedback.", "expected": "NON_TOXIC", "category": "✅ Polite"},
-            {"text": "This is a great article about technology.", "expected": "NON_TOXIC", "category": "✅ Neutral"},
-            {"text": "What a wonderful community we have here.", "expected": "NON_TOXIC", "category": "✅ Appreciation"},
-            {"text": "The weather forecast shows rain tomorrow.", "expected": "NON_TOXIC", "category": "✅ Factual"},
-            
-            # Mildly negative but not toxic
-            {"text": "I disagree with this opinion.", "expected": "NON_TOXIC", "category": "😐 Disagreement"},
-            {"text": "This is quite frustrating to deal with.", "expected": "NON_TOXIC", "category": "😐 Mild negative"},
-            {"text": "I'm having a difficult day today.", "expected": "NON_TOXIC", "category": "😐 Personal struggle"},
-            
-            # Borderline toxic
-            {"text": "You're being annoying.", "expected": "BORDERLINE", "category": "⚠️ Mild insult"},
-            {"text": "This is stupid.", "expected": "BORDERLINE", "category": "⚠️ Mild profanity"},
-            {"text": "That's a dumb idea.", "expected": "BORDERLINE", "category": "⚠️ Criticism"},
-            
-            # Clearly toxic content
-            {"text": "You're a complete idiot.", "expected": "TOXIC", "category": "🚨 Direct insult"},
-            {"text": "Go kill yourself.", "expected": "TOXIC", "category": "🚨 Self-harm suggestion"},
-            {"text": "I hate you so much.", "expected": "TOXIC", "category": "🚨 Hate speech"},
-            {"text": "You're worthless and should die.", "expected": "TOXIC", "category": "🚨 Severe harassment"},
-            {"text": "F**k you, you piece of sh*t.", "expected": "TOXIC", "category": "🚨 Profanity + insult"},
-            {"text": "Nobody likes you, loser.", "expected": "TOXIC", "category": "🚨 Bullying"},
-        ]
+        self.test_cases = MODEL_TEST_CASES
         
         self.load_model()
+        # Truncate where the service does (the model's limit, 512 tokens at most), not at a shorter test-only cap
+        self.max_length = min(self.tokenizer.model_max_length, 512)
+        self._bind_score_fn()
+        self._init_onnx_session()
+        if self.ort_session is None:
+            self._reduce_precision()
+            self._compile_model()
+        # Token ids per text, so repeated analyses of the same text skip the tokenizer
+        self._token_ids = lru_cache(maxsize=1024)(self._encode)
+        # (toxicity probability, logits or None) per token-id sequence; identical inputs skip the forward pass
+        self._score_cache: Dict[Tuple[int, ...], Tuple[float, Optional[np.ndarray]]] = {}
     
     def load_model(self):
-        """Load the model using different methods"""
+        """Load the first model that works: local, then pre-trained toxic-bert, then an alternative"""
         print("🤖 Loading toxicity detection model...")
         
-        # Method 1: Try our local model
+        candidates = [
+            ("pretrained", "unitary/toxic-bert", "🌐 Attempting to load pre-trained toxic-bert..."),
+            ("alternative", "martin-ha/toxic-comment-model", "🔄 Attempting to load alternative model..."),
+        ]
         if os.path.exists(self.model_path):
-            print(f"📁 Attempting to load local model from: {self.model_path}")
+            candidates.insert(0, ("local", self.model_path,
+                                  f"📁 Attempting to load local model from: {self.model_path}"))
+        
+        for source, model_name, message in candidates:
+            print(message)
             try:
-                self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
-                self.model = AutoModelForSequenceClassification.from_pretrained(self.model_path)
+                # The local model never needs a hub lookup
+                local_only = source == "local"
+                self.tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=local_only)
+                self.model = AutoModelForSequenceClassification.from_pretrained(model_name, local_files_only=local_only)
                 self.model.to(self.device)
                 self.model.eval()
                 
-                # Create pipeline
-                self.classifier = pipeline(
-                    "text-classification",
-                    model=self.model,
-                    tokenizer=self.tokenizer,
-                    device=0 if self.device == "cuda" else -1,
-                    return_all_scores=True
-                )
-                
-                print("✅ Local model loaded successfully")
-                self.model_source = "local"
+                print(f"✅ {source.capitalize()} model loaded successfully")
+                self.model_source = source
+                self.model_name = model_name
                 return
                 
             except Exception as e:
-                print(f"❌ Failed to load local model: {e}")
-        
-        # Method 2: Try pre-trained toxic-bert
-        print("🌐 Attempting to load pre-trained toxic-bert...")
-        try:
-            model_name = "unitary/toxic-bert"
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-            self.model.to(self.device)
-            self.model.eval()
-            
-            # Create pipeline
-            self.classifier = pipeline(
-                "text-classification",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if self.device == "cuda" else -1,
-                return_all_scores=True
-            )
+                print(f"❌ Failed to load {source} model: {e}")
             
-            print("✅ Pre-trained toxic-bert loaded successfully")
-            self.model_source = "pretrained"
+        raise Exception("Could not load any toxicity model")
+    
+    def _bind_score_fn(self):
+        """Pick the logits -> toxicity probability mapping once, from the model's label count"""
+        num_labels = self.model.config.num_labels
+        if num_labels == 1:
+            # Single output - sigmoid for probability
+            self._score_fn = lambda logits: torch.sigmoid(logits)[:, 0]
+        elif num_labels == 2:
+            # Two outputs - softmax, taking the toxic class from the model's labels rather than assuming index 1
+            id2label = {int(i): str(label).upper() for i, label in self.model.config.id2label.items()}
+            tox_idx = next((i for i, label in id2label.items()
+                            if "TOX" in label and not label.startswith(("NON", "NOT"))), 1)
+            print(f"🏷️  Toxic class: {tox_idx} ({id2label.get(tox_idx, '?')})")
+            self._score_fn = lambda logits: torch.softmax(logits, dim=-1)[:, tox_idx]
+        else:
+            # Other label layouts: still score every case, treating the last class as toxic
+            print(f"❓ Unexpected label count {num_labels}; using softmax of the last class as toxicity")
+            self._score_fn = lambda logits: torch.softmax(logits, dim=-1)[:, -1]
+    
+    def _init_onnx_session(self):
+        """With USE_ONNX=true on CPU, score through the service's INT8 ONNX Runtime export of the model"""
+        self.ort_session = None
+        if self.device != "cpu" or os.getenv("USE_ONNX", "false").lower() != "true":
+            return
+        if not ONNX_AVAILABLE:
+            print("⚠️  USE_ONNX is set but optimum[onnxruntime] is not installed; using PyTorch")
             return
-            
-        except Exception as e:
-            print(f"❌ Failed to load pre-trained model: {e}")
         
-        # Method 3: Try alternative model
-        print("🔄 Attempting to load alternative model...")
+        # Same <models dir>/<name>-onnx-int8 layout as the service, so with the default
+        # MODEL_CACHE_DIR either one reuses the other's export
+        models_dir = os.path.dirname(os.path.normpath(self.model_path))
+        onnx_name = os.path.basename(os.path.normpath(self.model_path)) if self.model_source == "local" else self.model_name
+        onnx_dir = os.path.join(models_dir, f"{onnx_name}-onnx-int8")
         try:
-            model_name = "martin-ha/toxic-comment-model"
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-            self.model.to(self.device)
-            self.model.eval()
-            
-            # Create pipeline
-            self.classifier = pipeline(
-                "text-classification",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if self.device == "cuda" else -1,
-                return_all_scores=True
-            )
-            
-            print("✅ Alternative model loaded successfully")
-            self.model_source = "alternative"
-            return
+            quantized_path = os.path.join(onnx_dir, "model_quantized.onnx")
+            if not os.path.exists(quantized_path):
+                print(f"📦 Exporting model to ONNX with dynamic INT8 quantization: {onnx_dir}")
+                ort_model = ORTModelForSequenceClassification.from_pretrained(self.model_name, export=True)
+                ort_model.save_pretrained(onnx_dir)
+                ORTQuantizer.from_pretrained(ort_model).quantize(
+                    save_dir=onnx_dir,
+                    quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+                )
             
+            sess_options = ort.SessionOptions()
+            sess_options.intra_op_num_threads = os.cpu_count()
+            sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.ort_session = ort.InferenceSession(quantized_path, sess_options, providers=["CPUExecutionProvider"])
+            self.ort_input_names = [model_input.name for model_input in self.ort_session.get_inputs()]
+            print(f"⚡ ONNX Runtime INT8 session loaded from {quantized_path}")
         except Exception as e:
-            print(f"❌ Failed to load alternative model: {e}")
-            
-        raise Exception("Could not load any toxicity model")
+            print(f"❌ ONNX Runtime setup failed, using PyTorch: {e}")
+            self.ort_session = None
     
-    def test_raw_model_output(self, text: str) -> Dict:
-        """Test raw model output to understand what it returns"""
-        print(f"\n🔍 Raw Model Analysis for: '{text[:50]}...'")
+    def _forward_logits(self, inputs: Dict) -> torch.Tensor:
+        """Model logits for tokenized inputs, from ONNX Runtime when a session is loaded"""
+        if self.ort_session is not None:
+            input_ids = inputs["input_ids"].numpy()
+            # Rebuilt single-row inputs carry no token_type_ids; a single segment is all zeros
+            ort_inputs = {name: inputs[name].numpy() if name in inputs else np.zeros_like(input_ids)
+                          for name in self.ort_input_names}
+            return torch.from_numpy(self.ort_session.run(["logits"], ort_inputs)[0]).float()
+        
+        with torch.inference_mode():
+            # FP32 at the softmax/sigmoid boundary so reduced precision doesn't shift thresholds
+            return self.model(**inputs).logits.float()
+    
+    def _reduce_precision(self):
+        """Apply the service's TORCH_DYNAMIC_QUANT (CPU) / TORCH_HALF_PRECISION settings, with the same dtype choice"""
+        quantized = False
+        if self.device == "cpu" and os.getenv("TORCH_DYNAMIC_QUANT", "false").lower() == "true":
+            try:
+                if "fbgemm" in torch.backends.quantized.supported_engines:
+                    torch.backends.quantized.engine = "fbgemm"
+                self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+                quantized = True
+                print("⚡ Linear layers dynamically quantized to INT8")
+            except Exception as e:
+                print(f"❌ Dynamic quantization failed, using FP32: {e}")
         
-        # Method 1: Pipeline approach
+        if not quantized and os.getenv("TORCH_HALF_PRECISION", "false").lower() == "true":
+            infer_dtype = half_precision_dtype(self.device)
+            if infer_dtype is not None:
+                self.model = self.model.to(dtype=infer_dtype)
+                print(f"⚡ Model cast to {infer_dtype}")
+            else:
+                print("ℹ️  No native half-precision support detected; keeping FP32")
+    
+    def _compile_model(self):
+        """Compile the model with torch.compile when TORCH_COMPILE=true (same switch as the service)"""
+        if os.getenv("TORCH_COMPILE", "false").lower() != "true":
+            return
+        
+        eager_model = self.model
         try:
-            pipeline_result = self.classifier(text)
-            print(f"📊 Pipeline result: {pipeline_result}")
+            self.model = torch.compile(self.model, mode="reduce-overhead", dynamic=True, fullgraph=False)
+            # Compile up front so the first scored forward isn't paying for it
+            for seq_len in (8, 128):
+                dummy = torch.ones((1, seq_len), dtype=torch.long, device=self.device)
+                with torch.inference_mode():
+                    self.model(input_ids=dummy, attention_mask=dummy)
+            print("⚡ Model compiled with torch.compile")
         except Exception as e:
-            print(f"❌ Pipeline failed: {e}")
-            pipeline_result = None
+            print(f"❌ torch.compile failed, using eager inference: {e}")
+            self.model = eager_model
+    
+    def _to_device(self, tensor: torch.Tensor) -> torch.Tensor:
+        """Move a CPU tensor to the model device; on CUDA via pinned memory so the copy is asynchronous"""
+        if self.device == "cuda":
+            return tensor.pin_memory().to(self.device, non_blocking=True)
+        return tensor
+    
+    def _encode(self, text: str) -> Tuple[int, ...]:
+        """Tokenize text to a hashable tuple of input ids"""
+        return tuple(self.tokenizer(text, truncation=True, max_length=self.max_length)['input_ids'])
+    
+    def test_raw_model_output(self, text: str) -> Dict:
+        """Test raw model output to understand what it returns"""
+        lines = [f"\n🔍 Raw Model Analysis for: '{text[:50]}...'"]
         
-        # Method 2: Direct model inference
+        # Direct model inference
         try:
-            inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
+            token_ids = self._token_ids(text)
+            cached = self._score_cache.get(token_ids)
+            if cached is not None:
+                # Identical token ids were already scored; skip the forward pass
+                prob, raw_logits = cached
+                lines.append(f"♻️  Reusing cached score: {prob:.4f}")
+            else:
+                input_ids = self._to_device(torch.as_tensor(token_ids).unsqueeze(0))
+                inputs = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
                 
-            print(f"🧮 Raw logits: {logits}")
-            print(f"📐 Logits shape: {logits.shape}")
-            
-            # Different interpretations based on output shape
-            if logits.shape[-1] == 1:
-                # Single output - sigmoid for probability
-                prob = torch.sigmoid(logits).cpu().numpy()[0][0]
-                print(f"🎯 Sigmoid probability: {prob:.4f}")
-                prediction = "TOXIC" if prob > 0.5 else "NON_TOXIC"
-                confidence = prob if prob > 0.5 else (1 - prob)
+                logits = self._forward_logits(inputs)
                 
-            elif logits.shape[-1] == 2:
-                # Two outputs [NON_TOXIC, TOXIC] - softmax
-                probs = torch.softmax(logits, dim=-1).cpu().numpy()[0]
-                print(f"🎯 Softmax probabilities: NON_TOXIC={probs[0]:.4f}, TOXIC={probs[1]:.4f}")
-                prediction = "TOXIC" if probs[1] > probs[0] else "NON_TOXIC"
-                confidence = max(probs)
-                prob = probs[1]  # toxicity probability
+                if self.debug:
+                    lines.append(f"🧮 Raw logits: {logits}")
+                lines.append(f"📐 Logits shape: {logits.shape}")
                 
-            else:
-                print(f"❓ Unexpected output shape: {logits.shape}")
-                prob = 0.5
-                prediction = "UNKNOWN"
-                confidence = 0.0
+                # The only device -> host sync for this text
+                prob = self._score_fn(logits)[0].item()
+                lines.append(f"🎯 Toxicity probability: {prob:.4f}")
+                raw_logits = logits.cpu().numpy()[0] if self.debug else None
+                self._score_cache[token_ids] = (prob, raw_logits)
+            
+            prediction = "TOXIC" if prob > 0.5 else "NON_TOXIC"
+            confidence = max(prob, 1 - prob)
                 
             direct_result = {
                 "prediction": prediction,
                 "toxicity_probability": prob,
                 "confidence": confidence,
-                "logits": logits.cpu().numpy().tolist()
+                "logits": raw_logits if self.debug else None
             }
-            print(f"🎲 Direct inference: {direct_result}")
+            lines.append(f"🎲 Direct inference: {direct_result}")
             
         except Exception as e:
-            print(f"❌ Direct inference failed: {e}")
+            lines.append(f"❌ Direct inference failed: {e}")
             direct_result = None
         
+        if not QUIET or direct_result is None:
+            sys.stdout.write('\n'.join(lines) + '\n')
+        
         return {
             "text": text,
-            "pipeline_result": pipeline_result,
             "direct_result": direct_result,
             "model_source": self.model_source
         }
     
+    def _batch_infer(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Score all texts in one padded forward pass; returns (toxicity probabilities, logits)"""
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="pt")
+        inputs = {k: self._to_device(v) for k, v in inputs.items()}
+        
+        logits = self._forward_logits(inputs)
+        probs = self._score_fn(logits)
+        
+        return probs.cpu().numpy(), logits.cpu().numpy()
+    
+    def _bucketed_infer(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """_batch_infer per length bucket so short texts aren't padded to the longest one"""
+        lengths = np.fromiter((len(self._token_ids(text)) for text in texts), dtype=np.int64, count=len(texts))
+        order = np.argsort(lengths, kind="stable")
+        bucket_of = np.searchsorted(LENGTH_BUCKETS, lengths[order])
+        
+        probs = np.empty(len(texts), dtype=np.float32)
+        logits = None
+        for bucket in np.unique(bucket_of):
+            idx = order[bucket_of == bucket]
+            bucket_probs, bucket_logits = self._batch_infer([texts[j] for j in idx])
+            if logits is None:
+                logits = np.empty((len(texts), bucket_logits.shape[-1]), dtype=bucket_logits.dtype)
+            # Scatter back to the original case order
+            probs[idx] = bucket_probs
+            logits[idx] = bucket_logits
+        
+        return probs, logits
+    
+    def _cached_infer(self, texts: List[str]) -> Tuple[np.ndarray, List[Optional[np.ndarray]]]:
+        """_bucketed_infer over texts whose token ids haven't been scored yet (each distinct sequence once)"""
+        keys = [self._token_ids(text) for text in texts]
+        # First text for each unscored token-id sequence
+        misses = {}
+        for j, key in enumerate(keys):
+            if key not in self._score_cache and key not in misses:
+                misses[key] = j
+        
+        if misses:
+            probs, logits = self._bucketed_infer([texts[j] for j in misses.values()])
+            for key, prob, row in zip(misses, probs, logits):
+                self._score_cache[key] = (float(prob), row)
+        
+        probs = np.fromiter((self._score_cache[key][0] for key in keys), dtype=np.float32, count=len(keys))
+        return probs, [self._score_cache[key][1] for key in keys]
+    
     def run_comprehensive_test(self):
         """Run comprehensive test suite"""
         print("=" * 80)
@@ -220,63 +331,102 @@ class ToxicityModelTester:
         print(f"🔧 Device: {self.device}")
         print(f"📊 Test cases: {len(self.test_cases)}")
         
-        results = []
-        correct_predictions = 0
+        results = [None] * len(self.test_cases)
+        correct = np.zeros(len(self.test_cases), dtype=np.bool_)
         
-        for i, test_case in enumerate(self.test_cases, 1):
-            print(f"\n{'='*20} Test {i}/{len(self.test_cases)} {'='*20}")
-            print(f"📝 {test_case['category']}: {test_case['text']}")
-            print(f"🎯 Expected: {test_case['expected']}")
-            
-            # Get raw model output
-            raw_result = self.test_raw_model_output(test_case['text'])
-            
-            # Determine actual prediction
-            if raw_result['direct_result']:
-                actual_prob = raw_result['direct_result']['toxicity_probability']
-                actual_prediction = raw_result['direct_result']['prediction']
+        # Score every case up front in length-bucketed batches; the loop below only reports
+        try:
+            probs, logits = self._cached_infer([test_case.text for test_case in self.test_cases])
+        except Exception as e:
+            print(f"❌ Batched inference failed: {e}")
+            probs = logits = None
+        
+        # Results are streamed as JSON lines; the summary goes to a sidecar file at the end.
+        # One timestamp names both files and is stored as a plain string.
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        results_file = f"toxicity_test_results_{timestamp}.jsonl"
+        
+        with open(results_file, 'wb') as results_out:
+            for i, test_case in enumerate(self.test_cases, 1):
+                # Each case's report is written in one go (or skipped entirely with QUIET=1)
+                lines = [
+                    f"\n{'='*20} Test {i}/{len(self.test_cases)} {'='*20}",
+                    f"📝 {test_case.category}: {test_case.text}",
+                    f"🎯 Expected: {test_case.expected}",
+                ]
                 
-                # Classify based on probability thresholds
-                if actual_prob < 0.3:
-                    classified = "NON_TOXIC"
-                elif actual_prob < 0.7:
-                    classified = "BORDERLINE"
-                else:
-                    classified = "TOXIC"
+                direct_result = None
+                if probs is not None:
+                    prob = float(probs[i - 1])
+                    if self.debug and logits[i - 1] is not None:
+                        lines.append(f"🧮 Raw logits: {logits[i - 1]}")
+                    direct_result = {
+                        "prediction": "TOXIC" if prob > 0.5 else "NON_TOXIC",
+                        "toxicity_probability": prob,
+                        "confidence": max(prob, 1 - prob),
+                        "logits": logits[i - 1] if self.debug else None
+                    }
+                raw_result = {
+                    "text": test_case.text,
+                    "direct_result": direct_result,
+                    "model_source": self.model_source
+                }
+                
+                # Determine actual prediction
+                if raw_result['direct_result']:
+                    actual_prob = raw_result['direct_result']['toxicity_probability']
+                    actual_prediction = raw_result['direct_result']['prediction']
                     
-            else:
-                actual_prob = 0.5
-                actual_prediction = "UNKNOWN"
-                classified = "UNKNOWN"
-            
-            # Check if prediction is reasonable
-            expected = test_case['expected']
-            is_correct = (
-                (expected == "NON_TOXIC" and classified in ["NON_TOXIC", "BORDERLINE"]) or
-                (expected == "BORDERLINE" and classified in ["NON_TOXIC", "BORDERLINE", "TOXIC"]) or
-                (expected == "TOXIC" and classified in ["BORDERLINE", "TOXIC"])
-            )
-            
-            if is_correct:
-                correct_predictions += 1
-                status = "✅ CORRECT"
-            else:
-                status = "❌ INCORRECT"
-            
-            print(f"📊 Toxicity Probability: {actual_prob:.4f}")
-            print(f"🏷️  Classified as: {classified}")
-            print(f"🎭 Result: {status}")
-            
-            results.append({
-                **test_case,
-                "actual_probability": actual_prob,
-                "actual_prediction": actual_prediction,
-                "classified": classified,
-                "is_correct": is_correct,
-                "raw_result": raw_result
-            })
+                    # Classify based on probability thresholds
+                    if actual_prob < 0.3:
+                        classified = "NON_TOXIC"
+                    elif actual_prob < 0.7:
+                        classified = "BORDERLINE"
+                    else:
+                        classified = "TOXIC"
+                        
+                else:
+                    actual_prob = 0.5
+                    actual_prediction = "UNKNOWN"
+                    classified = "UNKNOWN"
+                
+                # Check if prediction is reasonable
+                expected = test_case.expected
+                is_correct = (
+                    (expected == "NON_TOXIC" and classified in ["NON_TOXIC", "BORDERLINE"]) or
+                    (expected == "BORDERLINE" and classified in ["NON_TOXIC", "BORDERLINE", "TOXIC"]) or
+                    (expected == "TOXIC" and classified in ["BORDERLINE", "TOXIC"])
+                )
+                
+                correct[i - 1] = is_correct
+                status = "✅ CORRECT" if is_correct else "❌ INCORRECT"
+                
+                if not QUIET:
+                    lines += (
+                        f"📊 Toxicity Probability: {actual_prob:.4f}",
+                        f"🏷️  Classified as: {classified}",
+                        f"🎭 Result: {status}",
+                    )
+                    sys.stdout.write('\n'.join(lines) + '\n')
+                
+                record = {
+                    "text": test_case.text,
+                    "expected": expected,
+                    "category": test_case.category,
+                    "actual_probability": actual_prob,
+                    "actual_prediction": actual_prediction,
+                    "classified": classified,
+                    "is_correct": is_correct
+                }
+                if self.debug:
+                    record["raw_result"] = raw_result
+                results[i - 1] = record
+                
+                # Stream each record as it completes instead of dumping everything at the end
+                results_out.write(dumps(record, strict=True) + b"\n")
         
         # Summary
+        correct_predictions = int(correct.sum())
         accuracy = correct_predictions / len(self.test_cases)
         print("\n" + "="*80)
         print("📈 TEST SUMMARY")
@@ -287,25 +437,17 @@ class ToxicityModelTester:
         
         # Category breakdown
         print("\n📋 Results by Category:")
-        categories = {}
-        for result in results:
-            cat = result['category'].split(' ')[1] if ' ' in result['category'] else result['category']
-            if cat not in categories:
-                categories[cat] = {"correct": 0, "total": 0}
-            categories[cat]["total"] += 1
-            if result['is_correct']:
-                categories[cat]["correct"] += 1
-        
-        for cat, stats in categories.items():
-            acc = stats["correct"] / stats["total"]
-            print(f"  {cat}: {stats['correct']}/{stats['total']} ({acc:.1%})")
+        category_of = [r['category'].split(' ')[1] if ' ' in r['category'] else r['category'] for r in results]
+        totals = Counter(category_of)
+        correct_by_cat = Counter(cat for cat, ok in zip(category_of, correct) if ok)
+        for cat, total in totals.items():
+            print(f"  {cat}: {correct_by_cat[cat]}/{total} ({correct_by_cat[cat] / total:.1%})")
         
-        # Save detailed results
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        results_file = f"toxicity_test_results_{timestamp}.json"
+        # Save summary
+        summary_file = f"toxicity_test_results_{timestamp}.summary.json"
         
-        with open(results_file, 'w') as f:
-            json.dump({
+        with open(summary_file, 'wb') as f:
+            f.write(dumps({
                 "summary": {
                     "total_tests": len(self.test_cases),
                     "correct_predictions": correct_predictions,
@@ -314,10 +456,10 @@ class ToxicityModelTester:
                     "device": self.device,
                     "timestamp": timestamp
                 },
-                "results": results
-            }, f, indent=2, default=str)
+                "results_file": results_file
+            }, indent=True, strict=True))
         
-        print(f"\n💾 Detailed results saved to: {results_file}")
+        print(f"\n💾 Detailed results saved to: {results_file} (summary: {summary_file})")
         
         # Diagnosis
         print("\n🔬 DIAGNOSIS:")
@@ -337,11 +479,21 @@ class ToxicityModelTester:
 
 def main():
     """Main test execution"""
+    parser = argparse.ArgumentParser(description="Toxicity model test")
+    parser.add_argument("--text", action="append", metavar="TEXT",
+                        help="analyze this text's raw model output instead of running the test suite (repeatable)")
+    args = parser.parse_args()
+    
     print("🚀 Starting Toxicity Model Test...")
     
     try:
         tester = ToxicityModelTester()
-        results = tester.run_comprehensive_test()
+        if args.text:
+            # Ad-hoc diagnostics: raw model output for each given text
+            for text in args.text:
+                tester.test_raw_model_output(text)
+        else:
+            results = tester.run_comprehensive_test()
         
         print("\n✅ Test completed successfully!")
         return True
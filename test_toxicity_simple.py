@@ -4,95 +4,153 @@ Simple test script to validate toxicity detection logic
 Tests the model directly without Docker to isolate issues
 """
 
+import argparse
 import sys
 import os
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
 
 # Add the src directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from services.toxicity_detector import ToxicityDetector
 
-def test_messages():
-    """Test various messages to validate detection logic"""
+@dataclass(frozen=True, slots=True)
+class Case:
+    """A test message with its report preview precomputed"""
+    content: str
+    expected: bool
+    category: str
+    preview: str
+
+def _case(content, expected=False, category=""):
+    return Case(
+        content,
+        expected,
+        category,
+        content[:50] + "..." if len(content) > 50 else content,
+    )
+
+# Test cases with expected results
+CASES = (
+    # Clean content (should be non-toxic)
+    _case("What a beautiful day! I love this sunshine.", False, "✅ Positive"),
+    _case("Thank you for the helpful feedback!", False, "✅ Grateful"),
+    _case("This is a normal technical discussion.", False, "😐 Neutral"),
+    _case("I disagree but respect your opinion.", False, "😐 Respectful"),
+    _case("The weather forecast shows rain.", False, "😐 Factual"),
     
-    # Test cases with expected results
-    test_cases = [
-        # Clean content (should be non-toxic)
-        {"content": "What a beautiful day! I love this sunshine.", "expected": False, "category": "✅ Positive"},
-        {"content": "Thank you for the helpful feedback!", "expected": False, "category": "✅ Grateful"},
-        {"content": "This is a normal technical discussion.", "expected": False, "category": "😐 Neutral"},
-        {"content": "I disagree but respect your opinion.", "expected": False, "category": "😐 Respectful"},
-        {"content": "The weather forecast shows rain.", "expected": False, "category": "😐 Factual"},
-        
-        # Mildly negative (borderline)
-        {"content": "This is annoying and frustrating.", "expected": False, "category": "⚠️ Mild negative"},
-        {"content": "That's really disappointing.", "expected": False, "category": "⚠️ Disappointed"},
-        
-        # Clearly toxic content (should be toxic)
-        {"content": "You're a complete idiot.", "expected": True, "category": "🚨 Insult"},
-        {"content": "Go kill yourself, nobody likes you.", "expected": True, "category": "🚨 Severe threat"},
-        {"content": "You are so stupid and ugly.", "expected": True, "category": "🚨 Multiple insults"},
-        {"content": "F**k this s**t, you're all morons.", "expected": True, "category": "🚨 Profanity + insult"},
-        {"content": "I hate you so much, you should die.", "expected": True, "category": "🚨 Hate speech + threat"},
-        {"content": "You're worthless trash and everyone knows it.", "expected": True, "category": "🚨 Dehumanizing"},
-        {"content": "Kill yourself you pathetic loser.", "expected": True, "category": "🚨 Direct threat"},
-        {"content": "You're the dumbest person alive.", "expected": True, "category": "🚨 Extreme insult"},
-        {"content": "I hope you get cancer and die slowly.", "expected": True, "category": "🚨 Death wish"}
-    ]
+    # Mildly negative (borderline)
+    _case("This is annoying and frustrating.", False, "⚠️ Mild negative"),
+    _case("That's really disappointing.", False, "⚠️ Disappointed"),
+    
+    # Clearly toxic content (should be toxic)
+    _case("You're a complete idiot.", True, "🚨 Insult"),
+    _case("Go kill yourself, nobody likes you.", True, "🚨 Severe threat"),
+    _case("You are so stupid and ugly.", True, "🚨 Multiple insults"),
+    _case("F**k this s**t, you're all morons.", True, "🚨 Profanity + insult"),
+    _case("I hate you so much, you should die.", True, "🚨 Hate speech + threat"),
+    _case("You're worthless trash and everyone knows it.", True, "🚨 Dehumanizing"),
+    _case("Kill yourself you pathetic loser.", True, "🚨 Direct threat"),
+    _case("You're the dumbest person alive.", True, "🚨 Extreme insult"),
+    _case("I hope you get cancer and die slowly.", True, "🚨 Death wish"),
+)
+
+# Report row layouts (category, expected, detected, score, result, content)
+ROW_FMT = "%-20s %-10s %-10s %-8.3f %-8s %s"
+ERROR_ROW_FMT = "%-20s %-10s %-10s %-8s %-8s %s"
+
+# Expected labels as an array for the vectorized accuracy
+EXPECTED = np.fromiter((case.expected for case in CASES), dtype=np.bool_, count=len(CASES))
+
+# Inputs for the raw classifier output test
+RAW_CASES = (
+    _case("I love you"),
+    _case("You are stupid"),
+    _case("Go kill yourself"),
+)
+
+@lru_cache(maxsize=1)
+def get_detector(backend=None):
+    """Build the ML detector once per process (model loading dominates run time)"""
+    return ToxicityDetector(use_ml_model=True, backend=backend)
+
+def test_messages(detector=None, verbose=True):
+    """Test various messages to validate detection logic"""
     
     print("🧪 TOXICITY DETECTION TEST")
     print("=" * 80)
-    print(f"{'Category':<20} {'Expected':<10} {'Detected':<10} {'Score':<8} {'Result':<8} {'Content'}")
+    print(ERROR_ROW_FMT % ('Category', 'Expected', 'Detected', 'Score', 'Result', 'Content'))
     print("-" * 80)
     
     # Initialize detector
     try:
-        detector = ToxicityDetector(use_ml_model=True)
-        print(f"✅ Detector initialized: {detector.get_detector_info()['detector_type']}")
+        if detector is None:
+            detector = get_detector()
+        info = detector.get_detector_info()
+        print(f"✅ Detector initialized: {info['detector_type']}")
+        if 'runtime' in info:
+            flags = ", ".join(f"{key}={info[key]}" for key in ('quantized', 'eval_mode', 'inference_mode') if key in info)
+            print(f"   Runtime: {info['runtime']} ({flags})")
         print()
     except Exception as e:
         print(f"❌ Failed to initialize detector: {e}")
         return
     
-    # Test each case
-    correct_predictions = 0
-    total_tests = len(test_cases)
-    
-    for i, test_case in enumerate(test_cases, 1):
-        try:
-            result = detector.check_toxicity(test_case["content"])
-            
-            predicted_toxic = result["is_toxic"]
-            expected_toxic = test_case["expected"]
-            score = result["toxicity_score"]
-            
-            # Check if prediction is correct
-            is_correct = predicted_toxic == expected_toxic
-            if is_correct:
-                correct_predictions += 1
-                status = "✅ PASS"
-            else:
-                status = "❌ FAIL"
-            
-            # Format output
-            expected_str = "TOXIC" if expected_toxic else "CLEAN"
-            detected_str = "TOXIC" if predicted_toxic else "CLEAN"
-            content_preview = test_case["content"][:50] + "..." if len(test_case["content"]) > 50 else test_case["content"]
-            
-            print(f"{test_case['category']:<20} {expected_str:<10} {detected_str:<10} {score:<8.3f} {status:<8} {content_preview}")
-            
-            # Show detailed info for failures
-            if not is_correct:
-                print(f"    💡 Raw logit: {result.get('raw_logit', 'N/A')}, Confidence: {result.get('confidence', 'N/A')}")
-                print(f"    💡 Categories: {result.get('categories', [])}")
-                print()
-                
-        except Exception as e:
-            print(f"{test_case['category']:<20} {'ERROR':<10} {'ERROR':<10} {'N/A':<8} {'❌ ERR':<8} {test_case['content'][:50]}")
-            print(f"    💥 Error: {e}")
+    total_tests = len(CASES)
+    # Per-case predictions for the vectorized accuracy; errored cases stay unscored
+    predicted = np.zeros(total_tests, dtype=np.bool_)
+    scored = np.zeros(total_tests, dtype=np.bool_)
+    
+    # Score every case in one batched call; the loop below only reports
+    try:
+        results = detector.check_toxicity_batch([case.content for case in CASES])
+    except Exception as e:
+        results = [e] * total_tests
+    
+    # Report rows are collected and written in one go after the loop
+    rows = []
+    for i, (case, result) in enumerate(zip(CASES, results)):
+        if isinstance(result, Exception):
+            rows += (
+                ERROR_ROW_FMT % (case.category, 'ERROR', 'ERROR', 'N/A', '❌ ERR', case.content[:50]),
+                f"    💥 Error: {result}",
+            )
+            continue
+        
+        predicted_toxic = result["is_toxic"]
+        expected_toxic = case.expected
+        score = result["toxicity_score"]
+        predicted[i] = predicted_toxic
+        scored[i] = True
+        
+        # Check if prediction is correct
+        is_correct = predicted_toxic == expected_toxic
+        status = "✅ PASS" if is_correct else "❌ FAIL"
+        
+        # Format output
+        expected_str = "TOXIC" if expected_toxic else "CLEAN"
+        detected_str = "TOXIC" if predicted_toxic else "CLEAN"
+        
+        rows.append(ROW_FMT % (case.category, expected_str, detected_str, score, status, case.preview))
+        
+        # Show detailed info for failures
+        if verbose and not is_correct:
+            rows += (
+                f"    💡 Raw logit: {result.get('raw_logit', 'N/A')}, Confidence: {result.get('confidence', 'N/A')}",
+                f"    💡 Categories: {result.get('categories', [])}",
+                "",
+            )
+    
+    sys.stdout.write("\n".join(rows) + "\n")
+    sys.stdout.flush()
     
     # Summary
     print("-" * 80)
+    correct_predictions = int(((predicted == EXPECTED) & scored).sum())
     accuracy = (correct_predictions / total_tests) * 100
     print(f"📊 SUMMARY: {correct_predictions}/{total_tests} correct ({accuracy:.1f}% accuracy)")
     
@@ -107,29 +165,28 @@ def test_messages():
     
     return accuracy
 
-def test_model_raw_output():
+def test_model_raw_output(detector=None):
     """Test the raw model output to understand what we're getting"""
     print("\n🔬 RAW MODEL OUTPUT TEST")
     print("=" * 50)
     
     try:
-        detector = ToxicityDetector(use_ml_model=True)
+        if detector is None:
+            detector = get_detector()
         
-        # Test with a few examples to see raw output
-        test_inputs = [
-            "I love you",
-            "You are stupid", 
-            "Go kill yourself"
-        ]
+        if not detector.use_ml_model:
+            print("Raw model output is only available with the ML model")
+            return
         
-        for content in test_inputs:
+        # Test with a few examples to see raw output
+        for case in RAW_CASES:
+            content = case.content
             try:
-                # Get raw classifier output
-                clean_content = detector._clean_content_for_ml(content)
-                raw_result = detector.classifier(clean_content)
+                # Get the raw model output; memoized, so check_toxicity below reuses it
+                raw_output = detector.get_raw_model_output(content)
                 
                 print(f"\nInput: '{content}'")
-                print(f"Raw classifier output: {raw_result}")
+                print(f"Raw model output: logit={raw_output['raw_logit']:.4f}, score={raw_output['toxicity_score']:.4f}")
                 
                 # Process through our logic
                 processed_result = detector.check_toxicity(content)
@@ -142,13 +199,27 @@ def test_model_raw_output():
         print(f"Failed to test raw output: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simple toxicity detection tests")
+    parser.add_argument("--backend", choices=("pytorch", "onnx"), default=None,
+                        help="ML inference backend (default: the service's USE_ONNX setting)")
+    parser.add_argument("--quiet", action="store_true", help="Don't print details for failed cases")
+    args = parser.parse_args()
+    
     print("🚀 Starting Toxicity Detection Tests...")
     print()
     
+    # One detector (and one model load) shared by both tests, warmed up before timing starts
+    t_init = time.perf_counter()
+    detector = get_detector(args.backend)
+    detector.warm_up(len(CASES))
+    t_loop = time.perf_counter()
+    
     # Test 1: Main functionality
-    accuracy = test_messages()
+    accuracy = test_messages(detector, verbose=not args.quiet)
     
     # Test 2: Raw model output
-    test_model_raw_output()
+    test_model_raw_output(detector)
     
+    t_done = time.perf_counter()
+    print(f"\n⏱️  Initialization (load + warm-up): {t_loop - t_init:.2f}s, tests: {t_done - t_loop:.2f}s")
     print("\n🏁 Tests completed!")
@@ -3,12 +3,73 @@
 Quick test to verify the toxicity calculation fix
 """
 
-import requests
-import json
+import argparse
+import os
+import sys
+from harness import dumps, loads, make_session, run_cases
 
 BASE_URL = "http://localhost:5000"
 
-def test_fixed_calculations():
+# Shared keep-alive session so requests reuse pooled connections (one per test case)
+POOL_SIZE = 4
+SESSION = make_session(pool_maxsize=POOL_SIZE)
+
+# Per-case result report (status, verdict emoji, verdict, score, confidence, expected)
+RESULT_FMT = "%s Result: %s %s\n   Score: %.3f\n   Confidence: %.3f\n   Expected: %s"
+
+def _http_post(path, body):
+    """POST a JSON body to the running service; returns (status_code, decoded JSON or None)"""
+    response = SESSION.post(f"{BASE_URL}{path}", data=body, timeout=10)
+    return response.status_code, loads(response.content) if response.status_code == 200 else None
+
+def _in_process_post():
+    """Like _http_post, but dispatches to the service's Flask app in this process (no running server needed)"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+    from app import app
+    client = app.test_client()
+    
+    def post(path, body):
+        response = client.post(path, data=body, content_type="application/json")
+        return response.status_code, loads(response.data) if response.status_code == 200 else None
+    return post
+
+def _run_checks(payloads, use_batch=True, post=None):
+    """Score payloads via one /batch request (or one /check request per payload); returns
+    (status_code, result) per payload, or the exception that prevented it"""
+    if not use_batch:
+        if post is not None:
+            outcomes = []
+            for payload in payloads:
+                try:
+                    outcomes.append(post("/api/moderation/check", dumps(payload)))
+                except Exception as e:
+                    outcomes.append(e)
+            return outcomes
+        
+        # Over HTTP the single checks are sent concurrently
+        outcomes = []
+        bodies = [dumps(payload) for payload in payloads]
+        for future in run_cases(SESSION, f"{BASE_URL}/api/moderation/check", bodies, timeout=10, max_workers=POOL_SIZE):
+            try:
+                response, _ = future.result()
+                outcomes.append((response.status_code, loads(response.content) if response.status_code == 200 else None))
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+    
+    # The service scores every yeet in the batch with a single detector call
+    try:
+        status_code, body = (post or _http_post)("/api/moderation/batch", dumps({"yeets": payloads}))
+        if status_code != 200:
+            return [(status_code, None)] * len(payloads)
+        return [
+            RuntimeError(result['error']) if 'error' in result else (200, result)
+            for result in body['results']
+        ]
+    except Exception as e:
+        return [e] * len(payloads)
+
+def test_fixed_calculations(use_batch=True, in_process=False):
     """Test that the calculations are now correct"""
     print("🧪 Testing Fixed Toxicity Calculations")
     print("=" * 50)
@@ -36,53 +97,60 @@ def test_fixed_calculations():
         }
     ]
     
-    for i, test in enumerate(test_cases, 1):
-        print(f"\n[Test {i}] {test['description']}")
-        print(f"Content: \"{test['content']}\"")
+    payloads = [
+        {
+            "content": test["content"],
+            "yeet_id": f"test_{i}",
+            "user_id": "test_user"
+        }
+        for i, test in enumerate(test_cases, 1)
+    ]
+    outcomes = _run_checks(payloads, use_batch, _in_process_post() if in_process else None)
+    
+    # Report lines are collected and written in one go after the loop
+    lines = []
+    for i, (test, outcome) in enumerate(zip(test_cases, outcomes), 1):
+        lines.append("\n[Test %d] %s" % (i, test['description']))
+        lines.append("Content: \"%s\"" % test['content'])
+        
+        if isinstance(outcome, Exception):
+            lines.append("❌ Test error: %s" % outcome)
+            continue
+        
+        status_code, result = outcome
+        if status_code != 200:
+            lines.append("❌ API Error: %s" % status_code)
+            continue
+        
+        is_toxic = result['is_toxic']
         
-        try:
-            payload = {
-                "content": test["content"],
-                "yeet_id": f"test_{i}",
-                "user_id": "test_user"
-            }
-            
-            response = requests.post(
-                f"{BASE_URL}/api/moderation/check",
-                json=payload,
-                headers={'Content-Type': 'application/json'},
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                is_toxic = result['is_toxic']
-                score = result['toxicity_score']
-                confidence = result['confidence']
-                
-                # Check if result matches expectation
-                expected_toxic = test["expected"] == "toxic"
-                correct = is_toxic == expected_toxic
-                
-                status_emoji = "✅" if correct else "❌"
-                toxicity_emoji = "🚨" if is_toxic else "✅"
-                
-                print(f"{status_emoji} Result: {toxicity_emoji} {'TOXIC' if is_toxic else 'CLEAN'}")
-                print(f"   Score: {score:.3f}")
-                print(f"   Confidence: {confidence:.3f}")
-                print(f"   Expected: {test['expected'].upper()}")
-                
-                if not correct:
-                    print(f"   ⚠️  INCORRECT RESULT!")
-                    
-            else:
-                print(f"❌ API Error: {response.status_code}")
-                
-        except Exception as e:
-            print(f"❌ Test error: {e}")
+        # Check if result matches expectation
+        expected_toxic = test["expected"] == "toxic"
+        correct = is_toxic == expected_toxic
+        
+        lines.append(RESULT_FMT % (
+            "✅" if correct else "❌",
+            "🚨" if is_toxic else "✅",
+            "TOXIC" if is_toxic else "CLEAN",
+            result['toxicity_score'],
+            result['confidence'],
+            test['expected'].upper()
+        ))
+        
+        if not correct:
+            lines.append("   ⚠️  INCORRECT RESULT!")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
     
     print(f"\n{'=' * 50}")
     print("🏁 Test completed! Please restart the service to apply fixes.")
 
 if __name__ == "__main__":
-    test_fixed_calculations()
+    parser = argparse.ArgumentParser(description="Verify the toxicity calculation fix")
+    parser.add_argument("--no-batch", action="store_true",
+                        help="send one /check request per case instead of a single /batch request")
+    parser.add_argument("--in-process", action="store_true",
+                        help="call the service's Flask app directly instead of a server at " + BASE_URL)
+    args = parser.parse_args()
+    
+    test_fixed_calculations(use_batch=not args.no_batch, in_process=args.in_process)